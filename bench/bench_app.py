@@ -0,0 +1,246 @@
+# Benchmark: Startup, Seitenaufbau, Callbacks und Durchsatz von app.py gegen die Stand-ins
+# Pro Datenmenge (Zeilen in dp_view, API Payloads) wird gemessen:
+# - Startup: import app mit leerem (kalt) und gefülltem (warm) Cache Verzeichnis
+# - RSS nach dem Startup und am Ende
+# - p50/p99 für Seitenaufbau (/, _dash-layout, _dash-dependencies) und pro Callback,
+#   Callbacks auf dem Server (CLIENTSIDE_CALLBACKS=0), alle Tabs im Layout (LAZY_LAYOUT=0)
+# - Requests/s und p50/p99 unter gunicorn mit parallelen Clients
+# Figure/Response Caches sind aus (Größe 0), gemessen wird die echte Arbeit pro Request,
+# --cached misst mit Caches.
+#
+# python bench/bench_app.py [--rows 1000,10000,100000,1000000,10000000] [--samples 50]
+#     [--workers 2] [--clients 8] [--seconds 10] [--cached] [--json out.json]
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+sys.path.insert(0, HERE)
+
+import fixtures  # noqa: E402
+from load_clientside import callback_body, component_values  # noqa: E402
+
+# Werte für die Callback Inputs, pro Request zufällig gewählt
+CHOICES = {
+    ('year_umsatz_bar', 'value'): [[2017, 2018], [2018, 2020], [2019, 2020], [2017, 2020]],
+    ('year_umsatz_line', 'value'): [[2017, 2019], [2018, 2019], [2017, 2020]],
+    ('year_prd_qty', 'value'): [[2018, 2019], [2019, 2021], [2017, 2021]],
+    ('dd_prd_qty', 'value'): [['Pasta'], ['Pizza', 'Salad'], []],
+    ('dd_cust_prog', 'value'): [[1], [0], [0, 1]],
+    ('dd_newsl', 'value'): [[1], [0], [0, 1]],
+    ('tbl_prd_kpi', 'page_current'): [0],
+    ('tbl_cust_ytd', 'page_current'): [0, 1, 2, 3],
+    ('tbl_cust_ytd', 'sort_by'): [[], [{'column_id': 'Sum QTY', 'direction': 'desc'}]],
+}
+PAGES = ['/', '/_dash-layout', '/_dash-dependencies']
+
+
+def percentiles(samples):
+    a = np.asarray(samples) * 1000
+    return {'p50': float(np.percentile(a, 50)), 'p99': float(np.percentile(a, 99)),
+            'n': len(a)}
+
+
+def request_bodies(layout, deps, rng, n):
+    # n Callback Requests pro Server Callback, mit zufälligen Input Werten
+    values = component_values(layout, {})
+    bodies = {}
+    for dep in deps:
+        if dep.get('clientside_function') or not all(i['id'] in values for i in dep['inputs']):
+            continue
+        bodies[dep['output']] = []
+        for _ in range(n):
+            for item in dep['inputs'] + dep.get('state', []):
+                choices = CHOICES.get((item['id'], item['property']))
+                if choices:
+                    values[item['id']][item['property']] = rng.choice(choices)
+            bodies[dep['output']].append(callback_body(dep, values))
+    return bodies
+
+
+def child(samples):
+    start = time.perf_counter()
+    import app
+    app.create_app()
+    startup = time.perf_counter() - start
+    rss_startup = fixtures.peak_rss_mb()
+
+    client = app.server.test_client()
+    pages = {}
+    for path in PAGES:
+        times = []
+        for _ in range(samples):
+            t = time.perf_counter()
+            r = client.get(path)
+            times.append(time.perf_counter() - t)
+            assert r.status_code == 200, (path, r.status_code)
+        pages[path] = percentiles(times)
+
+    layout = json.loads(client.get('/_dash-layout').data)
+    deps = json.loads(client.get('/_dash-dependencies').data)
+    callbacks = {}
+    for output, bodies in request_bodies(layout, deps, random.Random(0), samples).items():
+        name = app.app.callback_map[output]['callback'].__name__
+        times = []
+        for body in bodies:
+            t = time.perf_counter()
+            r = client.post('/_dash-update-component', json=body)
+            times.append(time.perf_counter() - t)
+            assert r.status_code in (200, 204), (output, r.status_code)
+        callbacks['%s %s' % (name, output)] = percentiles(times)
+
+    return {'startup': startup, 'rss_startup': rss_startup, 'rss_end': fixtures.peak_rss_mb(),
+            'pages': pages, 'callbacks': callbacks}
+
+
+def run_child(env, samples):
+    out = subprocess.run([sys.executable, __file__, '--child', str(samples)],
+                         env=env, cwd=SRC, check=True, stdout=subprocess.PIPE)
+    return json.loads(out.stdout.decode().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def throughput(env, workers, clients, seconds, samples):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()',
+         '-b', '127.0.0.1:%d' % port, '-w', str(workers), '--timeout', '600',
+         '--log-level', 'warning'],
+        env=env, cwd=SRC)
+    try:
+        deadline = time.monotonic() + 600
+        while True:
+            try:
+                cnx = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+                cnx.request('GET', '/_dash-layout')
+                layout = json.loads(cnx.getresponse().read())
+                cnx.request('GET', '/_dash-dependencies')
+                deps = json.loads(cnx.getresponse().read())
+                cnx.close()
+                break
+            except (ConnectionError, OSError):
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError('gunicorn did not come up')
+                time.sleep(0.2)
+
+        # Mischung wie beim Seitenaufbau: Layout plus alle Callbacks
+        work = [('GET', '/_dash-layout', None)]
+        for bodies in request_bodies(layout, deps, random.Random(1), samples).values():
+            work += [('POST', '/_dash-update-component', json.dumps(b)) for b in bodies]
+
+        times, errors = [], [0]
+        lock = threading.Lock()
+        stop = time.monotonic() + seconds
+
+        def client(seed):
+            rng = random.Random(seed)
+            cnx = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+            local = []
+            while time.monotonic() < stop:
+                method, path, body = rng.choice(work)
+                t = time.perf_counter()
+                cnx.request(method, path, body, {'Content-Type': 'application/json',
+                                                 'Accept-Encoding': 'gzip'})
+                r = cnx.getresponse()
+                r.read()
+                local.append(time.perf_counter() - t)
+                if r.status not in (200, 204):
+                    with lock:
+                        errors[0] += 1
+            cnx.close()
+            with lock:
+                times.extend(local)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        return dict(percentiles(times), rps=len(times) / elapsed, errors=errors[0])
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def bench(workdir, rows, args):
+    db_path, payloads = fixtures.scaled(workdir, rows, min(rows, args.api_max))
+    with fixtures.StubApi(payloads) as api:
+        env = dict(os.environ, **fixtures.app_env(workdir, api.url, db_path))
+        env.update(CLIENTSIDE_CALLBACKS='0', LAZY_LAYOUT='0',
+                   CACHE_DIR=os.path.join(workdir, 'cache_%d' % rows))
+        if not args.cached:
+            env.update(FIG_CACHE_SIZE='0', RESPONSE_CACHE_SIZE='0')
+        shutil.rmtree(env['CACHE_DIR'], ignore_errors=True)
+
+        result = run_child(env, args.samples)
+        result['startup_warm'] = run_child(env, 1)['startup']
+        if args.seconds > 0:
+            result['gunicorn'] = throughput(env, args.workers, args.clients,
+                                            args.seconds, args.samples)
+    return result
+
+
+def report(rows, r):
+    print('rows %d' % rows)
+    print('  startup  cold %.2fs  warm %.2fs' % (r['startup'], r['startup_warm']))
+    print('  rss      startup %.0f MB  end %.0f MB' % (r['rss_startup'], r['rss_end']))
+    print('  %-62s %10s %10s' % ('', 'p50 ms', 'p99 ms'))
+    for name, p in list(r['pages'].items()) + list(r['callbacks'].items()):
+        print('  %-62s %10.1f %10.1f' % (name, p['p50'], p['p99']))
+    g = r.get('gunicorn')
+    if g:
+        print('  gunicorn %.1f req/s  p50 %.1f ms  p99 %.1f ms  errors %d' % (
+            g['rps'], g['p50'], g['p99'], g['errors']))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', default='1000,10000,100000,1000000')
+    parser.add_argument('--api-max', type=int, default=1000000,
+                        help='Obergrenze für Zeilen der API Payloads')
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10, help='0 = ohne gunicorn')
+    parser.add_argument('--cached', action='store_true')
+    parser.add_argument('--workdir', help='SQLite Dateien wiederverwenden')
+    parser.add_argument('--json', help='Ergebnisse als JSON speichern')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='pydash-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    for rows in [int(r) for r in args.rows.split(',')]:
+        results[rows] = bench(workdir, rows, args)
+        report(rows, results[rows])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        sys.path.insert(0, SRC)
+        print(json.dumps(child(int(sys.argv[2]))))
+    else:
+        main()
@@ -0,0 +1,191 @@
+# Benchmark: gleichzeitige, gleiche Callbacks (viele Nutzer, gleicher Slider Wert)
+# Pro Runde schicken alle Clients denselben Callback Request gleichzeitig ab, verglichen
+# werden Worker Klasse (sync/gthread) und Coalescing (CALLBACK_COALESCE) unter gunicorn,
+# dazu im Prozess die Zahl der tatsächlich gebauten Figures.
+# Figure/Response Caches sind aus (Größe 0), jede Runde ist ein Miss.
+#
+# python bench/bench_concurrency.py [--rows 100000] [--clients 16] [--rounds 30]
+#     [--workers 2] [--threads 8]
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+sys.path.insert(0, HERE)
+
+import fixtures  # noqa: E402
+from bench_app import free_port, percentiles, request_bodies  # noqa: E402
+
+# Server Callbacks mit Figure Cache (update_figure, update_output, update_data)
+OUTPUTS = ['umsatz_bar.figure', 'umsatz_line.figure', 'fig_prd_grp_quantity.figure',
+           'fig_sales_qty.figure']
+
+MODES = [
+    ('sync', '0'),
+    ('gthread', '0'),
+    ('gthread', '1'),
+]
+
+
+def rounds(layout, deps, n, seed):
+    # pro Runde ein zufälliger Request aus den Figure Callbacks
+    bodies = request_bodies(layout, deps, random.Random(seed), 4)
+    work = [json.dumps(b) for output in OUTPUTS for b in bodies.get(output, [])]
+    rng = random.Random(seed)
+    return [rng.choice(work) for _ in range(n)]
+
+
+def burst(clients, body, send):
+    # alle Clients starten gleichzeitig, Latenz pro Request
+    barrier = threading.Barrier(clients)
+    times = [None] * clients
+
+    def client(i):
+        barrier.wait()
+        t = time.perf_counter()
+        send(i, body)
+        times[i] = time.perf_counter() - t
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return times
+
+
+def child(clients, n):
+    # im Prozess: wie viele Figures werden bei gleichzeitigen Requests gebaut
+    import app
+    app.create_app()
+    client = app.server.test_client()
+    layout = json.loads(client.get('/_dash-layout').data)
+    deps = json.loads(client.get('/_dash-dependencies').data)
+    work = rounds(layout, deps, n, 0)
+
+    builds = [0]
+    compute = app.fig_cache._compute
+
+    def counted(*args):
+        builds[0] += 1
+        return compute(*args)
+    app.fig_cache._compute = counted
+
+    local = threading.local()
+
+    def send(i, body):
+        if not hasattr(local, 'client'):
+            local.client = app.server.test_client()
+        r = local.client.post('/_dash-update-component', data=body,
+                              content_type='application/json')
+        assert r.status_code in (200, 204), r.status_code
+
+    start = time.perf_counter()
+    for body in work:
+        burst(clients, body, send)
+    return {'requests': clients * n, 'builds': builds[0],
+            'coalesced': app.fig_cache.stats()['coalesced'],
+            'seconds': time.perf_counter() - start}
+
+
+def run_child(env, clients, n):
+    out = subprocess.run([sys.executable, __file__, '--child', str(clients), str(n)],
+                         env=env, cwd=SRC, check=True, stdout=subprocess.PIPE)
+    return json.loads(out.stdout.decode().splitlines()[-1])
+
+
+def gunicorn(env, worker_class, args):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()',
+         '-b', '127.0.0.1:%d' % port, '-w', str(args.workers), '-k', worker_class,
+         # mit mehr als einem Thread macht gunicorn aus sync gthread
+         '--threads', str(args.threads if worker_class != 'sync' else 1),
+         '--timeout', '600', '--log-level', 'warning'],
+        env=env, cwd=SRC)
+    try:
+        deadline = time.monotonic() + 600
+        while True:
+            try:
+                cnx = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+                cnx.request('GET', '/_dash-layout')
+                layout = json.loads(cnx.getresponse().read())
+                cnx.request('GET', '/_dash-dependencies')
+                deps = json.loads(cnx.getresponse().read())
+                cnx.close()
+                break
+            except (ConnectionError, OSError):
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError('gunicorn did not come up')
+                time.sleep(0.2)
+
+        connections = [http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+                       for _ in range(args.clients)]
+
+        def send(i, body):
+            cnx = connections[i]
+            cnx.request('POST', '/_dash-update-component', body,
+                        {'Content-Type': 'application/json'})
+            r = cnx.getresponse()
+            r.read()
+            assert r.status in (200, 204), r.status
+
+        times = []
+        start = time.perf_counter()
+        for body in rounds(layout, deps, args.rounds, 1):
+            times += burst(args.clients, body, send)
+        elapsed = time.perf_counter() - start
+        for cnx in connections:
+            cnx.close()
+        return dict(percentiles(times), rps=len(times) / elapsed)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pydash-concurrency-')
+    db_path, payloads = fixtures.scaled(workdir, args.rows)
+    with fixtures.StubApi(payloads) as api:
+        env = dict(os.environ, **fixtures.app_env(workdir, api.url, db_path))
+        env.update(CLIENTSIDE_CALLBACKS='0', LAZY_LAYOUT='0',
+                   FIG_CACHE_SIZE='0', RESPONSE_CACHE_SIZE='0')
+
+        print('rows %d, %d clients x %d rounds, %d workers, %d threads' % (
+            args.rows, args.clients, args.rounds, args.workers, args.threads))
+        print('%-22s %10s %10s %10s' % ('gunicorn', 'req/s', 'p50 ms', 'p99 ms'))
+        for worker_class, coalesce in MODES:
+            r = gunicorn(dict(env, CALLBACK_COALESCE=coalesce), worker_class, args)
+            print('%-22s %10.1f %10.1f %10.1f' % (
+                '%s coalesce=%s' % (worker_class, coalesce), r['rps'], r['p50'], r['p99']))
+
+        print('%-22s %10s %10s %10s' % ('in process', 'requests', 'builds', 'seconds'))
+        for coalesce in ('0', '1'):
+            r = run_child(dict(env, CALLBACK_COALESCE=coalesce), args.clients, args.rounds)
+            print('%-22s %10d %10d %10.2f' % (
+                'coalesce=%s' % coalesce, r['requests'], r['builds'], r['seconds']))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        sys.path.insert(0, SRC)
+        print(json.dumps(child(int(sys.argv[2]), int(sys.argv[3]))))
+    else:
+        main()
@@ -0,0 +1,64 @@
+# Benchmark: Masken-Filter (bisherige Callbacks) vs. FrameIndex
+# python bench/bench_indexes.py [max_rows]
+
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from indexes import FrameIndex, pairs  # noqa: E402
+
+GROUPS = ['Pizza', 'Pasta', 'Salad', 'Drinks', 'Dessert', 'Bread', 'Sauce', 'Snacks']
+
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Year': rng.integers(2015, 2022, rows),
+        'Month': rng.integers(1, 13, rows),
+        'Product Group': rng.choice(GROUPS, rows),
+        'Customer Program': rng.integers(0, 2, rows),
+        'Newsletter': rng.integers(0, 2, rows),
+        'Sum QTY': rng.integers(1, 500, rows),
+    })
+
+
+def timed(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e3
+
+
+def run(max_rows):
+    print('%10s %12s %12s %12s %12s %10s' % (
+        'rows', 'mask range', 'idx range', 'mask pairs', 'idx pairs', 'build'))
+    rows = 1000
+    while rows <= max_rows:
+        df = synthetic(rows)
+        number = max(1, 100000 // rows)
+
+        def mask_range():
+            f = df[(df.Year >= 2019) & (df.Year <= 2020)]
+            return f[f['Product Group'].isin(['Pizza', 'Pasta'])]
+
+        def mask_pairs():
+            return df[df['Customer Program'].isin([1]) & df['Newsletter'].isin([0, 1])]
+
+        build = timed(lambda: (FrameIndex(df, 'Year', 'Product Group'),
+                               FrameIndex(df, partition=['Customer Program', 'Newsletter'])), 1)
+        idx_prd = FrameIndex(df, 'Year', 'Product Group')
+        idx_cust = FrameIndex(df, partition=['Customer Program', 'Newsletter'])
+
+        print('%10d %10.3fms %10.3fms %10.3fms %10.3fms %8.1fms' % (
+            rows,
+            timed(mask_range, number),
+            timed(lambda: idx_prd.select(2019, 2020, keys=['Pizza', 'Pasta']), number),
+            timed(mask_pairs, number),
+            timed(lambda: idx_cust.select(keys=pairs([1], [0, 1])), number),
+            build))
+        rows *= 10
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
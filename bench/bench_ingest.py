@@ -0,0 +1,81 @@
+# Benchmark: fetchall() + DataFrame vs. blockweises Lesen (db.stream/query, aggregate)
+# Detailzeilen aus dp_view (SQLite Stand-in), gemessen werden Zeit und Peak RSS,
+# jede Variante in einem eigenen Prozess
+# python bench/bench_ingest.py [rows] [batch_size]
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+import fixtures  # noqa: E402
+import db  # noqa: E402
+
+db.QUERIES['bench_detail'] = """
+    SELECT row_dt, row_year, row_month, forecast, umsatz, deckungsbeitrag, gewinn
+    FROM dp_view
+    """
+
+
+def fetchall(database):
+    # bisheriger Weg: alle Tupel, dann der Frame
+    with database.connection() as cnx:
+        cur = cnx.cursor()
+        cur.execute(db.QUERIES['bench_detail'])
+        df = pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+        cur.close()
+    return df
+
+
+def aggregate(batches, by, measures):
+    # Blöcke direkt beim Lesen verdichten, im Speicher bleiben nur die Teilsummen
+    parts = [b.groupby(by, sort=False)[measures].sum() for b in batches]
+    return pd.concat(parts).groupby(level=list(range(len(by)))).sum().reset_index()
+
+
+VARIANTS = {
+    'fetchall + DataFrame': lambda database: fetchall(database),
+    'stream + concat': lambda database: database.query('bench_detail'),
+    'stream + aggregate': lambda database: aggregate(
+        database.stream('bench_detail'), ['row_year', 'forecast'],
+        ['umsatz', 'deckungsbeitrag', 'gewinn']),
+}
+
+
+def child(path, batch_size, variant):
+    # eigener Prozess pro Variante, Peak RSS ohne Einfluss der anderen
+    database = db.SQLiteDatabase(path, batch_size=batch_size)
+    base = fixtures.peak_rss_mb()
+    start = time.perf_counter()
+    result = VARIANTS[variant](database)
+    seconds = time.perf_counter() - start
+    peak = fixtures.peak_rss_mb() - base
+    print(json.dumps({'seconds': seconds, 'peak_mb': peak, 'rows': len(result)}))
+
+
+def run(rows, batch_size):
+    workdir = tempfile.mkdtemp(prefix='pydash-ingest-')
+    path = fixtures.scaled(workdir, rows, 1)[0]
+
+    print('rows %d, batch_size %d' % (rows, batch_size))
+    for variant in VARIANTS:
+        out = subprocess.run([sys.executable, __file__, '--child', path, str(batch_size),
+                              variant], check=True, stdout=subprocess.PIPE)
+        r = json.loads(out.stdout.decode().splitlines()[-1])
+        print('%-22s %7.2fs  peak +%8.1f MB  %d rows' % (
+            variant, r['seconds'], r['peak_mb'], r['rows']))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
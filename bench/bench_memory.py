@@ -0,0 +1,138 @@
+# Benchmark: Speicher pro gunicorn Worker nach einem Refresh aus dem SharedCache
+# Nach dem Start (preload, die Worker erben die Frames per fork) schreibt der Benchmark
+# eine neue Dataset Version in den Cache, wie es der ladende Worker tut. Alle Worker lesen
+# sie mit dem nächsten Refresh (cache.read, mmap). Gemessen wird pro Worker aus
+# /proc/<pid>/smaps_rollup: RSS, PSS (geteilte Seiten anteilig) und Private (nur dieser
+# Worker). Verglichen werden LZ4 komprimierte Feather Dateien mit vielen Chunks (Format 1)
+# und unkomprimierte mit einem Chunk pro Spalte (cache.py).
+#
+# python bench/bench_memory.py [--rows 100000] [--api-rows 1000000] [--workers 4]
+
+import argparse
+import http.client
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+sys.path.insert(0, HERE)
+sys.path.insert(0, SRC)
+
+import fixtures  # noqa: E402
+from bench_app import free_port  # noqa: E402
+
+REFRESH_SECONDS = 2
+
+
+def smaps(pid):
+    # kB Werte aus smaps_rollup -> MB
+    values = {}
+    with open('/proc/%d/smaps_rollup' % pid) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'],
+            'private': values['Private_Clean'] + values['Private_Dirty']}
+
+
+def workers(pid):
+    with open('/proc/%d/task/%d/children' % (pid, pid)) as f:
+        return [int(p) for p in f.read().split()]
+
+
+def write_version(cache_dir, compressed):
+    # neue Version wie vom ladenden Worker, ein Dataset geändert
+    import cache
+    from pyarrow import feather
+
+    shared = cache.SharedCache(cache_dir)
+    version, frames, _ = shared.read()
+    frames = dict(frames)
+    frames['df_sales_qty'] = frames['df_sales_qty'].assign(
+        **{'Sum QTY': frames['df_sales_qty']['Sum QTY'] + 1})
+    write_feather = feather.write_feather
+    if compressed:
+        # wie Format 1: Standard Kompression (LZ4) und Chunks
+        cache.feather.write_feather = lambda df, path, **kw: write_feather(df, path)
+    try:
+        meta = shared.write(frames)
+    finally:
+        cache.feather.write_feather = write_feather
+    size = sum(df.memory_usage(deep=True).sum() for df in frames.values()) / 2**20
+    return meta['version'], size
+
+
+def run(env, args, compressed):
+    env = dict(env, CACHE_DIR=tempfile.mkdtemp(prefix='pydash-memory-cache-'))
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()',
+         '-b', '127.0.0.1:%d' % port, '-w', str(args.workers), '--timeout', '600',
+         '--log-level', 'warning'],
+        env=env, cwd=SRC)
+    try:
+        deadline = time.monotonic() + 600
+        while True:
+            try:
+                cnx = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+                cnx.request('GET', '/_dash-layout')
+                cnx.getresponse().read()
+                cnx.close()
+                # alle Worker geforkt
+                if len(workers(proc.pid)) == args.workers:
+                    break
+                time.sleep(0.2)
+            except (ConnectionError, OSError):
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError('gunicorn did not come up')
+                time.sleep(0.2)
+        pids = workers(proc.pid)
+        boot = [smaps(pid) for pid in pids]
+
+        version, size = write_version(env['CACHE_DIR'], compressed)
+        # jeder Worker liest die neue Version mit seinem Refresh Thread
+        time.sleep(REFRESH_SECONDS * 3)
+        refreshed = [smaps(pid) for pid in pids]
+        return boot, refreshed, version, size
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(env['CACHE_DIR'], ignore_errors=True)
+
+
+def mean(rows, key):
+    return sum(r[key] for r in rows) / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--api-rows', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pydash-memory-')
+    db_path, payloads = fixtures.scaled(workdir, args.rows, args.api_rows)
+    with fixtures.StubApi(payloads) as api:
+        env = dict(os.environ, **fixtures.app_env(workdir, api.url, db_path))
+        env.update(PRELOAD='1', REFRESH_INTERVAL=str(REFRESH_SECONDS), CACHE_TTL='3600')
+
+        print('rows %d, api rows %d, %d workers' % (args.rows, args.api_rows, args.workers))
+        print('%-14s %-10s %10s %10s %12s %10s' % (
+            'feather', 'state', 'rss MB', 'pss MB', 'private MB', 'sum pss'))
+        for name, compressed in (('lz4, chunks', True), ('uncompressed', False)):
+            boot, refreshed, version, size = run(env, args, compressed)
+            for state, rows in (('boot', boot), ('v%d' % version, refreshed)):
+                print('%-14s %-10s %10.0f %10.0f %12.0f %10.0f' % (
+                    name, state, mean(rows, 'rss'), mean(rows, 'pss'), mean(rows, 'private'),
+                    sum(r['pss'] for r in rows)))
+        print('frames in memory %.0f MB' % size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Benchmark: apply(lambda x: yn_dict[x]) + astype(str) Hilfsspalten vs. presentation.py
+# python bench/bench_presentation.py [rows]
+
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from presentation import present, with_labels  # noqa: E402
+
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Year': rng.integers(2015, 2022, rows),
+        'Month': rng.integers(1, 13, rows),
+        'Customer Program': rng.integers(0, 2, rows),
+        'Newsletter': rng.integers(0, 2, rows),
+        'Sum QTY': rng.integers(1, 500, rows),
+    })
+
+
+def apply_based(df):
+    # bisheriger Weg in app.py
+    df = df.copy()
+    yn_dict = {0: "no", 1: "yes"}
+    df['Customer Program'] = df['Customer Program'].apply(lambda x: yn_dict[x])
+    df['Newsletter'] = df['Newsletter'].apply(lambda x: yn_dict[x])
+    df['syear'] = df['Year'].astype(str)
+    df['smonth'] = df['Month'].astype(str)
+    return df
+
+
+def vectorized(df):
+    return with_labels(present('df_sales_cust', df), 'syear', 'smonth')
+
+
+def run(rows):
+    df = synthetic(rows)
+    old = apply_based(df)
+    new = vectorized(df)
+    # gleiche Werte für die Anzeige
+    for col in ('Customer Program', 'Newsletter', 'syear', 'smonth'):
+        assert (old[col] == new[col].astype(str)).all(), col
+
+    t_old = min(timeit.repeat(lambda: apply_based(df), number=1, repeat=3))
+    t_new = min(timeit.repeat(lambda: vectorized(df), number=1, repeat=3))
+    mb = 1024 * 1024
+    print('rows          %d' % rows)
+    print('apply/astype  %8.3fs  %8.1f MB' % (t_old, old.memory_usage(deep=True).sum() / mb))
+    print('vectorized    %8.3fs  %8.1f MB' % (t_new, new.memory_usage(deep=True).sum() / mb))
+    print('speedup       %8.1fx' % (t_old / t_new))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
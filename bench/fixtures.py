@@ -0,0 +1,182 @@
+# Lokale Stand-ins für Benchmarks und Lasttests
+# - SQLite Datei mit dp_view und customers (DB_BACKEND=sqlite)
+# - Stub HTTP Server mit den vier deta.dev Endpoints (API_URL)
+
+import os
+import resource
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+GROUPS = ['Pizza', 'Pasta', 'Salad', 'Drinks', 'Dessert', 'Bread', 'Sauce', 'Snacks']
+
+
+def dp_view_rows(rng, rows):
+    days = pd.date_range('2017-01-01', '2021-12-31', freq='D')
+    dt = days[rng.integers(0, len(days), rows)]
+    return pd.DataFrame({
+        'row_dt': dt.strftime('%Y-%m-%d'),
+        'row_year': dt.year.astype(str),
+        'row_month': dt.month,
+        'forecast': rng.choice(['plan', 'ist'], rows),
+        'umsatz': rng.uniform(10, 1000, rows).round(2),
+        'deckungsbeitrag': rng.uniform(1, 300, rows).round(2),
+        'gewinn': rng.uniform(-50, 200, rows).round(2),
+    })
+
+
+def make_sqlite(path, rows=10000, customers=1000, seed=0, chunk=1000000):
+    # rows Zeilen in dp_view, verteilt über 2017-01-01 bis 2021-12-31, plan und ist
+    # in Blöcken von chunk Zeilen geschrieben, damit auch 10M Zeilen in den Speicher passen
+    rng = np.random.default_rng(seed)
+    cust = pd.DataFrame({
+        'id': np.arange(customers),
+        'cust_prog': rng.integers(0, 2, customers),
+        'newsletter': rng.integers(0, 2, customers),
+    })
+
+    if os.path.exists(path):
+        os.remove(path)
+    cnx = sqlite3.connect(path)
+    try:
+        for start in range(0, rows, chunk):
+            dp_view_rows(rng, min(chunk, rows - start)).to_sql(
+                'dp_view', cnx, index=False, if_exists='append', chunksize=100000)
+        cust.to_sql('customers', cnx, index=False)
+        cnx.execute('CREATE INDEX ix_dp_view_row_dt ON dp_view (row_dt)')
+        cnx.commit()
+    finally:
+        cnx.close()
+    return path
+
+
+def api_payloads(rows=1000, seed=0):
+    # rows Zeilen für die großen Endpoints (Produkte, Kunden/Monat)
+    rng = np.random.default_rng(seed)
+    products = max(rows // 5, 1)
+    descr = ['Product %d' % i for i in range(products)]
+    group = [GROUPS[i % len(GROUPS)] for i in range(products)]
+    p = rng.integers(0, products, rows)
+    product = pd.DataFrame({
+        'Year': rng.integers(2017, 2022, rows),
+        'Product Group': np.array(group)[p],
+        'Descr': np.array(descr)[p],
+        'Sum QTY': rng.integers(1, 1000, rows),
+    }).drop_duplicates(['Year', 'Descr'])
+
+    customers = max(rows // 10, 1)
+    cust_ytd = pd.DataFrame({
+        'Customer': ['Customer %d' % i for i in range(customers)],
+        'Customer Program': rng.integers(0, 2, customers),
+        'Newsletter': rng.integers(0, 2, customers),
+        'Sum QTY': rng.integers(1, 1000, customers),
+        'Sum Umsatz': rng.uniform(10, 10000, customers).round(2),
+    })
+    cust_month = pd.DataFrame({
+        'Year': rng.integers(2020, 2022, rows),
+        'Month': rng.integers(1, 13, rows),
+        'Customer Program': rng.integers(0, 2, rows),
+        'Newsletter': rng.integers(0, 2, rows),
+        'Sum QTY': rng.integers(1, 1000, rows),
+    })
+    product_ytd = pd.DataFrame({
+        'Product Group': GROUPS,
+        'Sum QTY': rng.integers(100, 10000, len(GROUPS)),
+        'AVG_DB_Stk': rng.uniform(0.5, 5, len(GROUPS)).round(2),
+    })
+    payloads = {
+        '/sales/groupby/product/': product,
+        '/sales/groupby/customer/month/': cust_month,
+    }
+    # KPI Endpoints pro Periode, gleiche Zeilen für jedes Jahr
+    for year in range(2017, 2022):
+        payloads['/sales/groupby/customer/%d/' % year] = cust_ytd
+        payloads['/sales/groupby/product/%d/' % year] = product_ytd
+    return payloads
+
+
+class StubApi:
+    def __init__(self, payloads, latency=0.0):
+        self.bodies = {path: df.to_json(orient='records').encode()
+                       for path, df in payloads.items()}
+        self.latency = latency
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    threading.Event().wait(stub.latency)
+                # Query String ignorieren (Perioden/Tenants sind hier egal)
+                body = stub.bodies.get(self.path.split('?')[0])
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = '"%x"' % hash(body)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server.server_port
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def app_env(workdir, api_url, db_path):
+    # Umgebung für src/app.py gegen die Stand-ins
+    return {
+        'DB_BACKEND': 'sqlite',
+        'DB_PATH': db_path,
+        'API_URL': api_url,
+        'CACHE_DIR': os.path.join(workdir, 'cache'),
+        'REFRESH_INTERVAL': '0',
+        'LOG_LEVEL': 'WARNING',
+    }
+
+
+def scaled(workdir, rows, api_rows=None):
+    # SQLite Datei und API Payloads für eine Datenmenge, die SQLite Datei wird
+    # pro Zeilenzahl wiederverwendet (10M Zeilen brauchen einige Minuten)
+    db_path = os.path.join(workdir, 'dp_view_%d.sqlite' % rows)
+    if not os.path.exists(db_path):
+        make_sqlite(db_path + '.tmp', rows=rows, customers=max(rows // 10, 100))
+        os.replace(db_path + '.tmp', db_path)
+    return db_path, api_payloads(api_rows or rows)
+
+
+def peak_rss_mb():
+    # VmHWM gilt pro Prozess, ru_maxrss übernimmt unter Linux den Wert des Parents
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,171 @@
+# Lasttest: Server-Requests und Server-CPU pro Sitzung, Callbacks auf dem Server vs. im Browser
+# Simuliert den Dash Renderer gegen die lokalen Stand-ins (fixtures.py): Seitenaufruf,
+# initiale Callbacks und Slider/Dropdown-Bewegungen. Clientside Callbacks schickt der
+# Renderer nicht an den Server, sie werden hier entsprechend nicht gezählt.
+#
+# python bench/load_clientside.py [sessions] [moves]
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+
+# Interaktionen pro Sitzung, reihum
+MOVES = [
+    ('year_umsatz_bar', 'value', [[2017, 2018], [2018, 2020], [2019, 2020]]),
+    ('year_umsatz_line', 'value', [[2017, 2019], [2018, 2019], [2017, 2020]]),
+    ('year_prd_qty', 'value', [[2018, 2019], [2019, 2021], [2017, 2021]]),
+    ('dd_prd_qty', 'value', [['Pasta'], ['Pizza', 'Salad'], []]),
+    ('tabs_details', 'active_tab', ['tab_customers', 'tab_products', 'tab_customers']),
+    ('dd_cust_prog', 'value', [[1], [0], [0, 1]]),
+]
+
+
+def component_values(node, values):
+    # alle Props mit id aus dem Layout JSON einsammeln
+    if isinstance(node, dict):
+        props = node.get('props')
+        if isinstance(props, dict) and 'id' in props:
+            values[props['id']] = props
+        for v in node.values():
+            component_values(v, values)
+    elif isinstance(node, list):
+        for v in node:
+            component_values(v, values)
+    return values
+
+
+def callback_body(dep, values):
+    # Request Body wie vom Dash Renderer, Input/State Werte aus values
+    def ref(item):
+        return dict(item, value=values.get(item['id'], {}).get(item['property']))
+    # mehrere Outputs: '..id1.prop1...id2.prop2..'
+    output = dep['output']
+    outputs = [dict(zip(('id', 'property'), o.rsplit('.', 1)))
+               for o in (output[2:-2].split('...') if output.startswith('..') else [output])]
+    return {
+        'output': output,
+        'outputs': outputs if output.startswith('..') else outputs[0],
+        'inputs': [ref(i) for i in dep['inputs']],
+        'state': [ref(s) for s in dep.get('state', [])],
+        'changedPropIds': ['%s.%s' % (i['id'], i['property']) for i in dep['inputs']],
+    }
+
+
+def fire(client, dep, values, owned):
+    output = dep['output']
+    body = callback_body(dep, values)
+    r = client.post('/_dash-update-component', json=body)
+    assert r.status_code in (200, 204), r.status_code
+
+    # neue Komponenten (z.B. Tab-Inhalt) übernehmen, die vorherigen entfernen
+    if r.status_code == 200 and output.endswith('.children'):
+        for comp in owned.pop(output, ()):
+            values.pop(comp, None)
+        children = component_values(json.loads(r.data)['response'], {})
+        values.update(children)
+        owned[output] = set(children)
+        return True
+    return False
+
+
+def ready(dep, values):
+    # der Renderer ruft einen Callback erst, wenn alle Inputs im Layout sind
+    return all(i['id'] in values for i in dep['inputs'])
+
+
+def settle(client, deps, values, owned, changed=None):
+    # Callbacks für geänderte Props feuern, bis keine neuen Komponenten mehr kommen
+    fired = set()
+    while True:
+        todo = [d for d in deps if d['output'] not in fired and ready(d, values) and (
+            changed is None or any((i['id'], i['property']) in changed for i in d['inputs']))]
+        if not todo:
+            return
+        new = set()
+        for dep in todo:
+            fired.add(dep['output'])
+            before = set(values)
+            if fire(client, dep, values, owned):
+                new |= set(values) - before
+        if not new:
+            return
+        # initiale Callbacks der neuen Komponenten
+        changed = {(i['id'], i['property']) for d in deps for i in d['inputs'] if i['id'] in new}
+
+
+def child(sessions, moves):
+    import app
+    app.create_app()
+
+    counter = {'requests': 0}
+
+    @app.server.before_request
+    def count():
+        counter['requests'] += 1
+
+    client = app.server.test_client()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for _ in range(sessions):
+        client.get('/')
+        layout = json.loads(client.get('/_dash-layout').data)
+        deps = json.loads(client.get('/_dash-dependencies').data)
+        server_deps = [d for d in deps if not d.get('clientside_function')]
+        values = component_values(layout, {})
+        owned = {}
+
+        # initiale Callbacks beim Seitenaufbau
+        settle(client, server_deps, values, owned)
+
+        for n in range(moves):
+            comp, prop, choices = MOVES[n % len(MOVES)]
+            if comp not in values:
+                continue
+            values[comp][prop] = choices[(n // len(MOVES)) % len(choices)]
+            settle(client, server_deps, values, owned, {(comp, prop)})
+
+    return {
+        'requests': counter['requests'],
+        'callback_requests': counter['requests'] - 3 * sessions,
+        'cpu': time.process_time() - cpu,
+        'wall': time.perf_counter() - start,
+    }
+
+
+def run(sessions, moves):
+    sys.path.insert(0, HERE)
+    import fixtures
+
+    workdir = tempfile.mkdtemp(prefix='pydash-load-')
+    db_path = fixtures.make_sqlite(os.path.join(workdir, 'dp_view.sqlite'))
+    results = {}
+    with fixtures.StubApi(fixtures.api_payloads()) as api:
+        for mode in ('0', '1'):
+            env = dict(os.environ, **fixtures.app_env(workdir, api.url, db_path))
+            env['CLIENTSIDE_CALLBACKS'] = mode
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', str(sessions), str(moves)],
+                env=env, cwd=SRC, check=True, stdout=subprocess.PIPE)
+            results[mode] = json.loads(out.stdout.decode().splitlines()[-1])
+
+    print('%d sessions x %d slider/dropdown moves' % (sessions, moves))
+    print('%-12s %10s %18s %10s %10s' % ('mode', 'requests', 'callback requests', 'cpu', 'wall'))
+    for mode, name in (('0', 'server'), ('1', 'clientside')):
+        r = results[mode]
+        print('%-12s %10d %18d %9.2fs %9.2fs' % (
+            name, r['requests'], r['callback_requests'], r['cpu'], r['wall']))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        sys.path.insert(0, SRC)
+        print(json.dumps(child(int(sys.argv[2]), int(sys.argv[3]))))
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 30)
@@ -0,0 +1,110 @@
+# Client für die deta.dev API
+# Eine Session mit Keep-Alive und gzip, Revalidierung per ETag/Last-Modified und
+# ein Response Cache auf Platte. Ist die API langsam oder weg, wird aus dem
+# Cache geliefert.
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ApiClient:
+    def __init__(self, base_url, cache_dir, ttl=600, timeout=10, pool_size=8):
+        self.base_url = base_url.rstrip('/')
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self.pool_size = pool_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self.reset()
+
+    def reset(self):
+        # neue Session, z.B. nach fork() - offene Sockets nicht mit dem Master teilen
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                              max_retries=Retry(total=2, backoff_factor=0.2,
+                                                status_forcelist=(502, 503, 504),
+                                                allowed_methods=('GET',)))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path):
+        return self.base_url + path
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir,
+                            hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def _read(self, url):
+        try:
+            with open(self._cache_path(url)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, url, entry):
+        path = self._cache_path(url)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(entry, f)
+        os.replace(path + '.tmp', path)
+
+    def get_json(self, path, template=None):
+        # result: cached (ttl), not_modified (304), fetched (200), stale (Fehler, alter Cache)
+        # template: Pfad ohne Parameter als Metrik Label, sonst eine Zeitreihe pro Query
+        start = time.perf_counter()
+        label = template or path
+        body, result = self._get_json(path, label)
+        metrics.observe('pydash_api_seconds', time.perf_counter() - start,
+                        path=label, result=result)
+        return body
+
+    def _get_json(self, path, label):
+        url = self.url(path)
+        entry = self._read(url)
+        if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+            return entry['body'], 'cached'
+
+        # bedingter Request, bei 304 wird nichts übertragen
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            r = self.session.get(url, headers=headers, timeout=self.timeout)
+            if r.status_code == 304 and entry is not None:
+                entry['fetched_at'] = time.time()
+                self._write(url, entry)
+                return entry['body'], 'not_modified'
+            r.raise_for_status()
+            body = r.json()
+        except (requests.RequestException, ValueError) as e:
+            if entry is None:
+                metrics.inc('pydash_api_errors_total', path=label)
+                raise
+            # API nicht erreichbar oder kaputte Antwort -> letzte gute Antwort
+            logger.warning('api %s failed (%s), serving cached response', url, e)
+            metrics.inc('pydash_api_errors_total', path=label)
+            return entry['body'], 'stale'
+
+        self._write(url, {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'body': body,
+        })
+        return body, 'fetched'
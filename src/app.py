@@ -1,18 +1,35 @@
 # läuft auf localhost:8050 im debug mode
 # .env für die MySQL DB
+# gunicorn: gunicorn -c gunicorn.conf.py "app:create_app()"
 
+import time
+import_start = time.perf_counter()
+
+import logging
 import os
-from dotenv import load_dotenv
-import dash
+import threading
 import dash_core_components as dcc
 import dash_html_components as html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+import dash
 import plotly.express as px
 import plotly.graph_objects as go
 
-import pandas as pd
-import requests
-import mysql.connector
+import data
+import metrics
+import push
+from refresh import DataStore
+from cache import SharedCache
+from figcache import FigureCache
+from indexes import build_indexes, pairs
+from presentation import map_values, with_labels
+from kpi import indicator_grid, kpi_frame
+from reduce import downsample, top_n
+from clientside import chart_spec, register_callbacks, spec_store
+from tables import paged_table, register_table
+from responses import DataApp
+from drilldown import VISIBLE, OnDemand, clicked, drill_graph
 
 # Bootstrap
 # https://www.bootstrapcdn.com/
@@ -20,8 +37,29 @@ import mysql.connector
 import dash_bootstrap_components as dbc
 
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"),
+                    format='%(asctime)s %(name)s %(levelname)s %(message)s')
+# nicht 'app': das ist der Logger von Flask mit eigenem Handler
+logger = logging.getLogger('boot')
+
+# LAZY_LAYOUT=1: Tab-Inhalte erst per Callback, wenn der Tab aktiv wird
+lazy_layout = os.getenv("LAZY_LAYOUT", "1") == "1"
+
+# Layout und Callback Antworten werden pro Dataset Version einmal serialisiert und
+# komprimiert (responses.py), höchstens RESPONSE_CACHE_SIZE Einträge und RESPONSE_CACHE_MB
+app = DataApp(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP],
+              # Komponenten der Tabs sind beim ersten Layout noch nicht da
+              suppress_callback_exceptions=lazy_layout,
+              version=lambda: store.version,
+              cache_size=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+              cache_bytes=int(float(os.getenv("RESPONSE_CACHE_MB", "64")) * 2**20),
+              # SLOW_CALLBACK_MS: langsamere Callbacks mit Inputs loggen (0 = aus),
+              # PROFILE_CALLBACKS=1: Callbacks unter cProfile, langsame mit Profil loggen
+              timer=metrics.CallbackTimer(int(os.getenv("SLOW_CALLBACK_MS", "1000")),
+                                          os.getenv("PROFILE_CALLBACKS", "0") == "1"))
 server = app.server
+# Prometheus Metriken unter /metrics
+metrics.register(server)
 
 colors = {
     'background': '#f9f7f7',
@@ -41,135 +79,85 @@ ma_top = {
 
 
 ########################################
-# SQL Data per MySQL driver + query
-# MySQL connection config
-
-load_dotenv()
-db_user = os.getenv("DB_USER")
-db_pw = os.getenv("DB_PW")
-env_db = os.getenv("DB")
-
-config = {
-    'user': db_user,
-    'password': db_pw,
-    'host': 'pschwan.de',
-    'database': env_db
-}
-
-cnx = mysql.connector.connect(**config)
-mycur = cnx.cursor()
-
-
-# data for charts
-mycur.execute("""
-    SELECT row_year, forecast, SUM(umsatz) AS umsatz, SUM(deckungsbeitrag) AS deckungsbeitrag
-    FROM dp_view
-    WHERE row_year IN ('2020', '2019', '2018', '2017')
-    GROUP BY row_year, forecast
-    ORDER BY row_year asc, forecast desc
-    """)
-df_sql_data = pd.DataFrame(mycur.fetchall(), columns=mycur.column_names)
-# für Slider
-df_sql_data['year'] = df_sql_data['row_year'].astype(int)
-
-# data for indicators
-mycur.execute("""
-    SELECT forecast,
-        SUM(gewinn) AS gewinn_ytd,
-        SUM(umsatz) AS umsatz_ytd,
-        SUM(deckungsbeitrag) AS db_ytd
-    FROM dp_view
-    WHERE DATEDIFF(row_dt, CURDATE()) < 0
-    AND row_dt >= '2021-01-01'
-    GROUP BY forecast
-    ORDER BY forecast desc
-    """)
-df_indicator = pd.DataFrame(mycur.fetchall(), columns=mycur.column_names)
-df_indicator = df_indicator.set_index(['forecast'])
-
-# data for indicator scatter plot
-mycur.execute("""
-SELECT 
-row_month,
-SUM(gewinn) AS gewinn_ytd
-FROM dp_view
-WHERE row_dt <= CURDATE()
-AND row_dt >= '2021-01-01'
-AND forecast = 'plan'
-GROUP BY row_month
-ORDER BY row_month asc;
-""")
-df_ind_scatter = pd.DataFrame(mycur.fetchall(), columns=mycur.column_names)
-# df_ind_scatter = df_indicator.set_index(['forecast'])
-
-
-# Customer Program PieChart
-mycur.execute("""
-    SELECT COUNT(cj.cust_prog) AS 'Count', 'Yes' AS 'CustomerProg'
-    FROM customers AS cj
-    WHERE cj.cust_prog = 1
-    UNION ALL
-    SELECT COUNT(cn.cust_prog) AS 'Count', 'No' AS 'CustomerProg'
-    FROM customers AS cn
-    WHERE cn.cust_prog = 0;
-    """)
-df_cust_prog = pd.DataFrame(
-    mycur.fetchall(), columns=mycur.column_names)
-
-
-# Newsletter Program PieChart
-mycur.execute("""
-    SELECT COUNT(cj.newsletter) AS 'Count', 'Yes' AS 'Newsletter'
-    FROM customers AS cj
-    WHERE cj.newsletter = 1
-    UNION ALL
-    SELECT COUNT(cn.newsletter) AS 'Count', 'No' AS 'Newsletter'
-    FROM customers AS cn
-    WHERE cn.newsletter = 0;
-    """)
-df_newsletter = pd.DataFrame(
-    mycur.fetchall(), columns=mycur.column_names)
-
-
-mycur.close()
-
-########################################
-# API data
-url_product = 'https://34hj8d.deta.dev/sales/groupby/product/'
-r = requests.get(url_product)
-json = r.json()
-df_product = pd.DataFrame(json)
-df_prd_grp_quantity = df_product
-# für den Slider, aber muss doch geschickter gehen!
-df_prd_grp_quantity['syear'] = df_prd_grp_quantity['Year'].astype(str)
-
-
-# Effizienz Kundenprogramm und Newsletter
-url_cust_YTD = 'https://34hj8d.deta.dev/sales/groupby/customer/2021/'
-r = requests.get(url_cust_YTD)
-json = r.json()
-df_sales_cust = pd.DataFrame(json)
-# modify for presentation layer
-yn_dict = {0: "no", 1: "yes"}
-df_sales_cust['Customer Program'] = df_sales_cust['Customer Program'].apply(
-    lambda x: yn_dict[x])
-df_sales_cust['Newsletter'] = df_sales_cust['Newsletter'].apply(
-    lambda x: yn_dict[x])
-
-
-url_cust_ymonth = 'https://34hj8d.deta.dev/sales/groupby/customer/month/'
-r = requests.get(url_cust_ymonth)
-json = r.json()
-df_sales_qty = pd.DataFrame(json)
-df_sales_qty['syear'] = df_sales_qty['Year'].astype(str)
-df_sales_qty['smonth'] = df_sales_qty['Month'].astype(str)
-
-
-# KPIs Produktgruppe
-url_product_YTD = 'https://34hj8d.deta.dev/sales/groupby/product/2021/'
-r = requests.get(url_product_YTD)
-json = r.json()
-df_prd_grp_kpi = pd.DataFrame(json)
+# Daten laden (boot()) und im Hintergrund aktualisieren (after_fork())
+# REFRESH_INTERVAL in Sekunden, 0 = kein Refresh
+# CACHE_DIR (data.py): gemeinsamer Cache aller Worker, CACHE_TTL in Sekunden
+
+refresh_interval = int(os.getenv("REFRESH_INTERVAL", "3600"))
+shared_cache = SharedCache(data.cache_dir,
+                           int(os.getenv("CACHE_TTL", str(refresh_interval or 3600))))
+store = DataStore(data.load_data, refresh_interval, cache=shared_cache,
+                  prepare=build_indexes)
+
+# Figures der Callbacks pro Dataset Version und Input cachen
+# CALLBACK_COALESCE=0: gleichzeitige gleiche Callbacks einzeln rechnen (Benchmark)
+fig_cache = FigureCache(int(os.getenv("FIG_CACHE_SIZE", "256")),
+                        int(os.getenv("FIG_CACHE_TTL", "3600")),
+                        coalesce=os.getenv("CALLBACK_COALESCE", "1") == "1")
+
+
+def data_version():
+    return store.version
+
+
+def data_age():
+    loaded_at = store.snapshot().loaded_at
+    return time.time() - loaded_at if loaded_at else None
+
+
+metrics.gauge('pydash_data_version', data_version)
+metrics.gauge('pydash_response_cache_bytes', lambda: app.responses.stats()['bytes'])
+metrics.gauge('pydash_data_age_seconds', data_age)
+for stat in ('hits', 'misses', 'evictions', 'size', 'coalesced'):
+    metrics.gauge('pydash_figure_cache_' + stat, lambda stat=stat: fig_cache.stats()[stat])
+
+# Drill-down Ergebnisse pro Drill Pfad und Dataset Version (drilldown.py)
+drill = OnDemand(data_version, int(os.getenv("DRILL_CACHE_SIZE", "128")),
+                 int(os.getenv("DRILL_CACHE_TTL", "600")))
+metrics.gauge('pydash_drill_coalesced', lambda: drill.flight.coalesced)
+# andere Perioden als PERIOD: Indikatoren pro Jahr, KPI Tabellen pro Tenant und Jahr
+periods = OnDemand(data_version, int(os.getenv("PERIOD_CACHE_SIZE", "8")),
+                   int(os.getenv("PERIOD_CACHE_TTL", "3600")))
+metrics.gauge('pydash_period_cache_size', lambda: periods.results.stats()['size'])
+
+
+def period_frames(year):
+    # Indikator Frames einer Periode (nur Rollup): PERIOD aus dem Snapshot, andere auf Anfrage
+    if year is None or int(year) == data.period:
+        return store.snapshot().frames
+    return periods.get('indicators', data.load_period_indicators, int(year))
+
+
+def period_kpis(dataset, year):
+    # KPI Tabelle einer Periode per API, unabhängig von den Indikatoren
+    if year is None or int(year) == data.period:
+        return store.snapshot().frames[dataset]
+    return periods.get('kpis', data.load_period_kpis, dataset, data.tenant, int(year))
+
+# Slider/Dropdown Filter für umsatz_bar, umsatz_line und fig_prd_grp_quantity im Browser
+# statt per Callback auf dem Server, CLIENTSIDE_CALLBACKS=0 schaltet zurück
+use_clientside = os.getenv("CLIENTSIDE_CALLBACKS", "1") == "1"
+
+# Push neuer Versionen an offene Seiten (push.py): sse, interval (Polling) oder off
+# sse belegt pro offener Seite einen Thread (gthread) bzw. unter sync einen ganzen Worker,
+# für viele Seiten WORKER_CLASS=gevent (gunicorn.conf.py)
+feed = push.VersionFeed(data_version)
+store.listeners.append(feed.notify)
+push_components = push.register(app, feed, mode=os.getenv("PUSH_MODE", "interval"),
+                                poll_ms=int(os.getenv("PUSH_POLL_MS", "30000")),
+                                stream_seconds=int(os.getenv("PUSH_STREAM_SECONDS", "300")))
+# Monatsverlauf pro (Version, Periode), Basis für extendData statt neuer Figure
+trends = FigureCache(16)
+# ein Aufbau der Page Figures gleichzeitig (page_figures)
+page_lock = threading.Lock()
+
+# Punkt-Budgets pro Chart (reduce.py): Kategorien auf der x-Achse (Rest = "Other") und
+# Punkte pro Zeitreihe, 0 = aus
+max_categories = int(os.getenv("CHART_MAX_CATEGORIES", "25"))
+max_points = int(os.getenv("CHART_MAX_POINTS", "1000"))
+
+# KPI Tabellen: Zeilen pro Seite, Paging/Sortieren/Filtern auf dem Server
+table_page_size = int(os.getenv("TABLE_PAGE_SIZE", "20"))
 
 
 # define labels for the Charts
@@ -182,479 +170,826 @@ labels = {'row_year': 'Year',
           'db_ytd': 'Margin YTD',
           'AVG_DB_Stk': 'Avg Margin per piece',
           'smonth': 'Month',
+          'row_month': 'Month',
           'syear': 'Year',
           'Descr': 'Description',
           }
 
 
 ########################################
-# Setup Indicator
-fig_ind_rev = go.Figure()
-fig_ind_profit = go.Figure()
-fig_ind_margin = go.Figure()
-fig_ind_rev_alt = go.Figure()
-# https://plotly.com/python/indicator/
-
-fig_ind_rev.add_trace(go.Indicator(
-    title="Umsatz Plan/Ist 2021 YTD",
-    mode="number+delta",
-    value=df_indicator.loc['ist', 'umsatz_ytd'],
-    delta={'reference': df_indicator.loc['plan', 'umsatz_ytd']},
-    domain={'row': 0, 'column': 0}
-))
-
-fig_ind_profit.add_trace(go.Indicator(
-    title="Gewinn Plan/Ist 2021 YTD",
-    mode="number+delta+gauge",
-    value=df_indicator.loc['ist', 'gewinn_ytd'],
-    delta={'reference': df_indicator.loc['plan', 'gewinn_ytd']},
-    domain={'row': 0, 'column': 1}
-))
-
-fig_ind_rev_alt.add_trace(go.Indicator(
-    title="Umsatz Plan/Ist 2021 YTD",
-    mode="number+gauge",
-    value=df_indicator.loc['ist', 'umsatz_ytd'],
-    delta={'reference': df_indicator.loc['plan', 'umsatz_ytd']},
-    domain={'row': 0, 'column': 0}
-))
-
-fig_ind_profit_alt = go.Figure(go.Indicator(
-    title="Gewinn Plan/Ist 2021 YTD",
-    mode="number+delta",
-    value=df_indicator.loc['ist', 'gewinn_ytd'],
-    delta={'reference': df_indicator.loc['plan', 'gewinn_ytd']},
-    domain={'row': 0, 'column': 1}
-))
-
-fig_ind_profit_alt.add_trace(go.Scatter(
-    y=df_ind_scatter['gewinn_ytd'],
-    x=df_ind_scatter['row_month']
-))
-
-
-fig_ind_margin.add_trace(go.Indicator(
-    title="Deckungsbeitrag Plan/Ist 2021 YTD",
-    mode="number+delta",
-    value=df_indicator.loc['ist', 'db_ytd'],
-    delta={'reference': df_indicator.loc['plan', 'db_ytd']},
-    domain={'row': 0, 'column': 2}
-))
+# Setup Indicator und Figure Definition
 
-########################################
-# Figure Definition
-fig_line = px.line(df_sql_data, x='row_year', y='umsatz',
-                   color='forecast', labels=labels,
-                   title='Umsatz Plan/Ist')
+# Indikator Kennzahlen (df_indicator Spalten) -> Titel, %d = Periode
+INDICATOR_TITLES = {
+    'umsatz_ytd': "Umsatz Plan/Ist %d YTD",
+    'gewinn_ytd': "Gewinn Plan/Ist %d YTD",
+    'db_ytd': "Deckungsbeitrag Plan/Ist %d YTD",
+}
+# Segmente der Kunden KPIs
+PROGRAM = {0: 'ohne Programm', 1: 'Programm'}
+NEWSLETTER = {0: 'ohne Newsletter', 1: 'Newsletter'}
+
+def build_indicators(frames, year):
+    # Plan/Ist aller Indikator Kennzahlen in einem Schritt (kpi.py),
+    # aus df_indicator/df_ind_scatter (Snapshot oder periods)
+    kpis = kpi_frame(frames['df_indicator'].rename_axis('forecast').reset_index(),
+                     list(INDICATOR_TITLES))
+    df_ind_scatter = downsample(frames['df_ind_scatter'], 'row_month', 'gewinn_ytd', max_points)
+    titles = {k: v % year for k, v in INDICATOR_TITLES.items()}
+    # https://plotly.com/python/indicator/
+
+    fig_ind_rev = indicator_grid(kpis.loc[['umsatz_ytd']], titles)
+    fig_ind_profit = indicator_grid(kpis.loc[['gewinn_ytd']], titles,
+                                    mode="number+delta+gauge")
+    fig_ind_rev_alt = indicator_grid(kpis.loc[['umsatz_ytd']], titles, mode="number+gauge")
+    fig_ind_profit_alt = indicator_grid(kpis.loc[['gewinn_ytd']], titles)
+    # eigene Figure, neue Monate kommen per extendData (update_indicators)
+    fig_ind_profit_trend = go.Figure(go.Scatter(
+        y=df_ind_scatter['gewinn_ytd'],
+        x=df_ind_scatter['row_month'],
+        mode='lines+markers'
+    ))
+    fig_ind_profit_trend.update_layout(title="Gewinn Plan pro Monat %d" % year, height=250,
+                                       margin={'t': 40, 'b': 30})
+    fig_ind_margin = indicator_grid(kpis.loc[['db_ytd']], titles)
+
+    return {
+        'fig_ind_rev': fig_ind_rev,
+        'fig_ind_profit': fig_ind_profit,
+        'fig_ind_margin': fig_ind_margin,
+        'fig_ind_rev_alt': fig_ind_rev_alt,
+        'fig_ind_profit_alt': fig_ind_profit_alt,
+        'fig_ind_profit_trend': fig_ind_profit_trend,
+    }
+
+
+def trend_extension(old, new):
+    # extendData für den Monatsverlauf, wenn die bisherigen Punkte gleich geblieben sind,
+    # sonst None (ganze Figure)
+    n = len(old)
+    # ausgedünnte Verläufe lassen sich nicht fortschreiben
+    if max_points and len(new) > max_points or n > len(new) or not (new['row_month'].to_numpy()[:n] == old['row_month'].to_numpy()).all() \
+            or not (new['gewinn_ytd'].to_numpy()[:n] == old['gewinn_ytd'].to_numpy()).all():
+        return None
+    rows = new.iloc[n:]
+    return [{'x': [rows['row_month'].tolist()], 'y': [rows['gewinn_ytd'].tolist()]}, [0]]
+
+
+def prd_qty_bars(df):
+    # ein Balken pro Produkt und Jahr, nur die größten Produkte
+    return top_n(df, 'Descr', 'Sum QTY', max_categories, by=['Year'])
+
+
+def sales_qty_bars(df):
+    # Zeilen pro Kunde -> ein Balken pro Monat und Jahr
+    return top_n(df, 'Month', 'Sum QTY', 0, by=['Year'])
+
+
+def year_over_year(df, by, titles):
+    # Segment KPIs: laufendes Jahr (YTD) gegen dieselben Monate im Vorjahr,
+    # ein Indikator pro Segment und Kennzahl
+    year = int(df['Year'].max())
+    month = int(df.loc[df['Year'] == year, 'Month'].max())
+    df = df[(df['Year'] == year) | ((df['Year'] == year - 1) & (df['Month'] <= month))]
+    kpis = kpi_frame(df, list(titles), column='Year', actual=year, reference=year - 1, by=by)
+    return indicator_grid(kpis, {m: '%s %d/%d, Monat 1-%d' % (t, year, year - 1, month)
+                                 for m, t in titles.items()},
+                          columns=4, relative=True)
+
+
+def build_figures(frames):
+    df_sql_data = frames['df_sql_data']
+    df_cust_prog = frames['df_cust_prog']
+    df_newsletter = frames['df_newsletter']
+    df_prd_grp_quantity = frames['df_prd_grp_quantity']
+    df_sales_qty = frames['df_sales_qty']
+
+    # Figure Definition
+    fig_line = px.line(df_sql_data, x='row_year', y='umsatz',
+                       color='forecast', labels=labels,
+                       title='Umsatz Plan/Ist')
+    fig_line.update_xaxes(type='category')
 
-fig_bar = px.bar(df_sql_data, x="row_year", y="deckungsbeitrag",
-                 color="forecast", barmode="group", labels=labels,
-                 title="Deckungsbeitrag Plan/Ist")
+    fig_bar = px.bar(df_sql_data, x="row_year", y="deckungsbeitrag",
+                     color="forecast", barmode="group", labels=labels,
+                     title="Deckungsbeitrag Plan/Ist")
+    fig_bar.update_xaxes(type='category')
+
+    fig_prd_grp_quantity = px.bar(with_labels(prd_qty_bars(df_prd_grp_quantity), 'syear'),
+                                  x="Descr", y="Sum QTY",
+                                  color="syear", barmode="group", labels=labels,
+                                  title="Menge pro Produkt")
 
-fig_prd_grp_quantity = px.bar(df_prd_grp_quantity, x="Descr", y="Sum QTY",
-                              color="syear", barmode="group", labels=labels,
-                              title="Menge pro Produkt")
+    fig_cust_prog = px.pie(df_cust_prog, values='Count',
+                           names='CustomerProg', title='Teilnahme Kundenbindungsprogramm')
 
-fig_cust_prog = px.pie(df_cust_prog, values='Count',
-                       names='CustomerProg', title='Teilnahme Kundenbindungsprogramm')
+    fig_newsletter = px.pie(df_newsletter, values='Count',
+                            names='Newsletter', title='Newsletter abonniert')
 
-fig_newsletter = px.pie(df_newsletter, values='Count',
-                        names='Newsletter', title='Newsletter abonniert')
+    fig_sales_qty = px.bar(with_labels(sales_qty_bars(df_sales_qty), 'syear', 'smonth'),
+                           x="smonth",
+                           y="Sum QTY", color="syear", barmode="group", labels=labels,
+                           title="Menge pro Kunde")
+
+    # df_prd_grp_quantity hat keine Monate, dort gibt es keinen vergleichbaren Zeitraum
+    fig_kpi_customers = year_over_year(
+        df_sales_qty.assign(**{'Customer Program': map_values(df_sales_qty['Customer Program'],
+                                                              PROGRAM),
+                               'Newsletter': map_values(df_sales_qty['Newsletter'],
+                                                        NEWSLETTER)}),
+        ['Customer Program', 'Newsletter'], {'Sum QTY': 'Menge'})
+
+    return {
+        **build_indicators(frames, data.period),
+        'fig_kpi_customers': fig_kpi_customers,
+        'fig_line': fig_line,
+        'fig_bar': fig_bar,
+        'fig_prd_grp_quantity': fig_prd_grp_quantity,
+        'fig_cust_prog': fig_cust_prog,
+        'fig_newsletter': fig_newsletter,
+        'fig_sales_qty': fig_sales_qty,
+    }
 
-fig_sales_qty = px.bar(df_sales_qty, x="smonth",
-                       y="Sum QTY", color="syear", barmode="group", labels=labels,
-                       title="Menge pro Kunde")
 
 ########################################
-# The Data App
-app.layout = dbc.Container(
-    [
-        dbc.Row(dbc.Col(
-            html.H1("Data-driven Decisions", className="display-1")
-        )),
-        dbc.Row(dbc.Col(html.Hr())),
-        dbc.Row([dbc.Col([
-            html.P(
-                "Daten nutzen, um bessere Entscheidungen schneller zu treffen.", className="lead"),
-            html.Hr(),
-            html.P("Historisch gewachsene SQL Datenbanken, diverse Cloud und SaaS Lösungen und dann gibt es da noch eine Reihe von Excel Dateien? Wieviel Zeit investieren Sie, um die relevanten Daten zu finden, aufzubereiten und für wichtige Entscheidungen zu analysieren?"),
-            html.P("Lassen Sie uns im persönlichen Gespräch Ihre Fragen und Anforderungen klären. Im Blog und in den Unterlagen zum Download finden Sie weitere Informationen."),
-            dbc.Button("Termin vereinbaren",
-                       href="mailto:kontakt@pschwan.de",
-                       color="danger", block=True),
-            dbc.Button("Was ist ein Data Product?",
-                       href="https://www.pschwan.de/digitalisierung/was-ist-das-ein-data-product", target="_blank", color="secondary", outline=True, block=True),
-            dbc.Button("Download Data-driven Business Model",
-                       href="https://pschwan.de/blog/uploads/Data-driven%20Business%20Model.pdf", target="_blank", color="secondary", outline=True, block=True),
-        ]), dbc.Col(
-            dbc.Alert(
-                dcc.Markdown('''
-             #### Das Demo Tech Stack
-             - **MySQL** Datenbank, in meiner Infrastruktur
-             - **Python**, Pandas, Requests und ein paar weitere Packages (GitHub Repo für CI/CD)
-             - **FastAPI** = API Data Layer, um Daten und Dashboard zu verbinden (serverless in der Cloud)
-             - **Plotly Dash** = Dashboard und Data App Funktionen (Cloud PaaS)
-
-             *Anm.:* Es geht um die Daten und Anbindung, nicht um Information Design und UX. Für das Dashboard werden größtenteils Bootstrap Komponenten eingesetzt.
-             
-             '''), color="secondary"
-            )
-        )
-        ]),
-        dbc.Row(dbc.Col(html.Hr()), style=ma_top),
-        dbc.Row([
-            dbc.Col(html.H2("KPI Indikatoren - den aktuellen Status prüfen",
-                            className="display-4")),
-            dbc.Col(dbc.Alert(dcc.Markdown('''
-                    #### Nur wenig Zeit?
-                    - High-Level Indikatoren, um aggregierte KPIs zu visualisieren
-                    - Kombinationen von Kennzahl, Abweichung Soll/Ist, Grafik und Chart
-                    '''), color="secondary"))
-        ]),
-        dbc.Row(
+# Figures und Clientside Specs einmal pro Dataset Version bauen und serialisieren,
+# jeder Seitenaufruf nutzt danach nur noch die fertigen Dicts
+
+def page_figures(snap):
+    # eigener Slot am Snapshot statt fig_cache: wird nicht verdrängt (auch nicht bei
+    # FIG_CACHE_SIZE=0) und mit der nächsten Version freigegeben
+    figs = snap.memo.get('page_figures')
+    if figs is not None:
+        return figs
+    with page_lock:
+        figs = snap.memo.get('page_figures')
+        if figs is None:
+            figs = snap.memo['page_figures'] = build_page_figures(snap)
+    return figs
+
+
+def build_page_figures(snap):
+    frames = snap.frames
+    figs = {name: fig.to_plotly_json() for name, fig in build_figures(frames).items()}
+    trends.put((snap.version, data.period), frames['df_ind_scatter'])
+    if use_clientside:
+        transition = {'transition': {'duration': 500}}
+        figs['spec_umsatz_bar'] = chart_spec(
+            figs['fig_bar'], frames['df_sql_data'], 'row_year', 'deckungsbeitrag',
+            'forecast', 'row_year', layout=transition)
+        figs['spec_umsatz_line'] = chart_spec(
+            figs['fig_line'], frames['df_sql_data'], 'row_year', 'umsatz',
+            'forecast', 'row_year', layout=transition)
+        # Filter nach Gruppe im Browser -> größte Produkte pro Gruppe
+        figs['spec_fig_prd_grp_quantity'] = chart_spec(
+            figs['fig_prd_grp_quantity'],
+            top_n(frames['df_prd_grp_quantity'], 'Descr', 'Sum QTY', max_categories,
+                  by=['Year', 'Product Group'], within=['Product Group']),
+            'Descr', 'Sum QTY', 'Year', 'Year', group_col='Product Group')
+    return figs
+
+
+def shell(fig):
+    # nur Layout (Titel, Achsen, Größe), die Daten kommen mit dem ersten Callback
+    # nach dem Seitenaufbau - für Charts unterhalb der Indikatoren
+    return {'data': [], 'layout': fig['layout']}
+
+
+########################################
+# Tabs "Übersicht Produkte" und "Übersicht Kunden"
+
+def products_tab(frames, figs):
+    df_prd_grp_quantity = frames['df_prd_grp_quantity']
+    df_prd_grp_kpi = frames['df_prd_grp_kpi']
+    return dbc.Card(
+        dbc.CardBody(
             [
-                dbc.Col(
-                    dcc.Graph(
-                        id='indicators_rev',
-                        figure=fig_ind_rev
-                    )
+                dcc.RangeSlider(
+                    id='year_prd_qty',
+                    min=df_prd_grp_quantity['Year'].min(),
+                    max=df_prd_grp_quantity['Year'].max(),
+                    value=[df_prd_grp_quantity['Year'].max(
+                    ) - 1, df_prd_grp_quantity['Year'].max()],
+                    marks={str(year): str(year)
+                           for year in df_prd_grp_quantity['Year'].unique()},
+                    step=None
                 ),
-                dbc.Col(
-                    dcc.Graph(
-                        id='indicators_profit',
-                        figure=fig_ind_profit
-                    )
-                ),
-            ]
-        ),
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        id='indicators_rev_other',
-                        figure=fig_ind_rev_alt
-                    )
+                dcc.Dropdown(
+                    id='dd_prd_qty',
+                    options=[{'label': k, 'value': k}
+                             for k in df_prd_grp_quantity['Product Group'].unique()],
+                    value=['Pizza'],
+                    multi=True,
+                    placeholder='Alle Produkte - selektiere eine Produktgruppe'
                 ),
-                dbc.Col(
-                    dcc.Graph(
-                        id='indicators_profit_other',
-                        figure=fig_ind_profit_alt
-                    )
+                dcc.Graph(
+                    id='fig_prd_grp_quantity',
+                    figure=figs['fig_prd_grp_quantity']
                 ),
+                *([spec_store('fig_prd_grp_quantity', figs['spec_fig_prd_grp_quantity'])]
+                  if use_clientside else []),
+
+                html.H3("YTD KPIs",
+                        className="display-4", style=ma_top),
+                paged_table('tbl_prd_kpi', df_prd_grp_kpi, table_page_size)
             ]
         ),
-        dbc.Row(dbc.Col(html.Hr())),
-        dbc.Row([
-            dbc.Col(html.H2("KPI Charts - Zusammenhänge und Beziehungen schnell erfassen",
-                            className="display-4")),
-            dbc.Col(dbc.Alert(dcc.Markdown('''
-                    #### Interaktiv - probieren Sie es aus:
-                    - Die Slider anpassen und die **Jahre auswählen**
-                    - Die Maus über die Graphen bewegen und die **out-of-the-box Features** kennenlernen
-                    - Zum Beispiel: Zoomen oder die Charts als Grafik speichern!
-                    - *Tipp:* der Home-Button bzw. das kleine Haus bringt Sie auch im Tablet Modus wieder zum ursprünglichen Graphen
-                    '''), color="danger"))
-        ]),
-        dbc.Row(
-            [
-                dbc.Col([
-                    dcc.Graph(
-                        id='umsatz_bar',
-                        figure=fig_bar
+        className="mt-3",
+    )
+
+
+def customers_tab(frames, figs):
+    df_sales_cust = frames['df_sales_cust']
+    return dbc.Card(
+        dbc.CardBody([
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(dcc.Graph(
+                            id='fig_cust_prog',
+                            figure=figs['fig_cust_prog']
+                        ), body=True, className="mt-3"), width=6
+                    ),
+                    dbc.Col(
+                        dbc.Card(
+                            dcc.Graph(
+                                id='fig_newsletter',
+                                figure=figs['fig_newsletter']
+                            ), body=True, className="mt-3"), width=6
                     ),
-                    dcc.RangeSlider(
-                        id='year_umsatz_bar',
-                        min=df_sql_data['year'].min(),
-                        max=df_sql_data['year'].max(),
-                        value=[df_sql_data['year'].min(
-                        ), df_sql_data['year'].max()],
-                        marks={str(year): str(year)
-                               for year in df_sql_data['year'].unique()},
-                        step=None
+                ]
+            ),
+            html.Hr(),
+            html.H3("Programm Kundenbindung KPIs",
+                    className="display-4"),
+            dbc.Row([
+                dbc.Col([
+                    html.P("Filter Programm Kundenbindung ja/nein"),
+                    dcc.Dropdown(
+                        id='dd_cust_prog',
+                        options=[{'label': 'ja', 'value': 1},
+                                 {'label': 'nein', 'value': 0}],
+                        value=[1, 0],
+                        multi=True,
+                        placeholder='Alle angezeigt - selektiere ja/nein'
                     )
                 ]),
                 dbc.Col([
-                    dcc.Graph(
-                        id='umsatz_line',
-                        figure=fig_line
-                    ),
-                    dcc.RangeSlider(
-                        id='year_umsatz_line',
-                        min=df_sql_data['year'].min(),
-                        max=df_sql_data['year'].max(),
-                        value=[df_sql_data['year'].min(
-                        ), df_sql_data['year'].max()],
-                        marks={str(year): str(year)
-                               for year in df_sql_data['year'].unique()},
-                        step=None
+                    html.P("Filter Newsletter ja/nein"),
+                    dcc.Dropdown(
+                        id='dd_newsl',
+                        options=[{'label': 'ja', 'value': 1},
+                                 {'label': 'nein', 'value': 0}],
+                        value=[1, 0],
+                        multi=True,
+                        placeholder='Alle angezeigt - selektiere ja/nein'
                     )
                 ])
+            ]),
+            dbc.Row(dbc.Col(html.Br())),
+            dbc.Row([
+                dbc.Col(
+                    dcc.Graph(
+                        id='fig_sales_qty',
+                        figure=figs['fig_sales_qty'])),
             ]
-        ),
-        dbc.Row(dbc.Col(html.Hr()), style=ma_top),
-        dbc.Jumbotron(
-            [
-                html.H1("Danke, wir benutzen Excel!", className="display-3"),
+            ),
+            dcc.Graph(
+                id='kpi_customers',
+                figure=figs['fig_kpi_customers']
+            ),
+            html.Hr(),
+            html.H3("YTD KPIs", className="display-4"),
+            paged_table('tbl_cust_ytd', df_sales_cust, table_page_size)
+        ])
+    )
+
+
+def details_tabs(frames, figs):
+    if lazy_layout:
+        # Inhalt erst per Callback, wenn der Tab aktiv wird
+        return [
+            dbc.Tabs([
+                dbc.Tab(label="Übersicht Produkte", tab_id='tab_products'),
+                dbc.Tab(label="Übersicht Kunden", tab_id='tab_customers'),
+            ], id='tabs_details', active_tab='tab_products'),
+            dcc.Loading(html.Div(id='tab_content')),
+        ]
+    return [
+        dbc.Tabs([
+            dbc.Tab(products_tab(frames, figs), label="Übersicht Produkte"),
+            dbc.Tab(customers_tab(frames, figs), label="Übersicht Kunden"),
+        ]),
+    ]
+
+
+########################################
+# The Data App
+# Layout als Funktion: jeder Seitenaufruf nutzt den aktuellen Snapshot
+def serve_layout():
+    snap = store.snapshot()
+    frames = snap.frames
+    df_sql_data = frames['df_sql_data']
+    df_periods = frames['df_periods']
+    figs = page_figures(snap)
+
+    stores = []
+    if use_clientside:
+        stores = [spec_store('umsatz_bar', figs['spec_umsatz_bar']),
+                  spec_store('umsatz_line', figs['spec_umsatz_line'])]
+
+    return dbc.Container(
+        [
+            dbc.Row(dbc.Col(
+                html.H1("Data-driven Decisions", className="display-1")
+            )),
+            dbc.Row(dbc.Col(html.Hr())),
+            dbc.Row([dbc.Col([
                 html.P(
-                    "Daten unterschiedlichster Quellen zur Verfügung stellen, integrieren und nutzen - auch in Excel.",
-                    className="lead",
-                ),
-                html.Hr(className="my-2"),
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Markdown('''
-                            #### IT Unterstützung, die zu Ihren Herausforderungen passt:
-                            - Wo entstehen die täglichen Herausforderungen?
-                            - Welche Daten und Informationen wären für die Problemlösung nützlich?
-                            - Sind diese Daten verfügbar? Warum nicht?
-                            - "Wir haben keine interne IT..."
-                            '''),
-                        html.P("Lassen Sie uns im persönlichen Gespräch Ihre Fragen und Anforderungen klären. Im Blog und in den Unterlagen zum Download finden Sie weitere Informationen."),
-                    ]),
+                    "Daten nutzen, um bessere Entscheidungen schneller zu treffen.", className="lead"),
+                html.Hr(),
+                html.P("Historisch gewachsene SQL Datenbanken, diverse Cloud und SaaS Lösungen und dann gibt es da noch eine Reihe von Excel Dateien? Wieviel Zeit investieren Sie, um die relevanten Daten zu finden, aufzubereiten und für wichtige Entscheidungen zu analysieren?"),
+                html.P("Lassen Sie uns im persönlichen Gespräch Ihre Fragen und Anforderungen klären. Im Blog und in den Unterlagen zum Download finden Sie weitere Informationen."),
+                dbc.Button("Termin vereinbaren",
+                           href="mailto:kontakt@pschwan.de",
+                           color="danger", block=True),
+                dbc.Button("Was ist ein Data Product?",
+                           href="https://www.pschwan.de/digitalisierung/was-ist-das-ein-data-product", target="_blank", color="secondary", outline=True, block=True),
+                dbc.Button("Download Data-driven Business Model",
+                           href="https://pschwan.de/blog/uploads/Data-driven%20Business%20Model.pdf", target="_blank", color="secondary", outline=True, block=True),
+            ]), dbc.Col(
+                dbc.Alert(
+                    dcc.Markdown('''
+                 #### Das Demo Tech Stack
+                 - **MySQL** Datenbank, in meiner Infrastruktur
+                 - **Python**, Pandas, Requests und ein paar weitere Packages (GitHub Repo für CI/CD)
+                 - **FastAPI** = API Data Layer, um Daten und Dashboard zu verbinden (serverless in der Cloud)
+                 - **Plotly Dash** = Dashboard und Data App Funktionen (Cloud PaaS)
+
+                 *Anm.:* Es geht um die Daten und Anbindung, nicht um Information Design und UX. Für das Dashboard werden größtenteils Bootstrap Komponenten eingesetzt.
+
+                 '''), color="secondary"
+                )
+            )
+            ]),
+            dbc.Row(dbc.Col(html.Hr()), style=ma_top),
+            dbc.Row([
+                dbc.Col(html.H2("KPI Indikatoren - den aktuellen Status prüfen",
+                                className="display-4")),
+                dbc.Col(dbc.Alert(dcc.Markdown('''
+                        #### Nur wenig Zeit?
+                        - High-Level Indikatoren, um aggregierte KPIs zu visualisieren
+                        - Kombinationen von Kennzahl, Abweichung Soll/Ist, Grafik und Chart
+                        '''), color="secondary"))
+            ]),
+            dbc.Alert("Neue Daten: Indikatoren und Tabellen sind aktualisiert, "
+                      "für alle Charts die Seite neu laden.",
+                      id='push_notice', color="info", dismissable=True, is_open=False),
+            # Version der angezeigten Indikatoren
+            dcc.Store(id='push_rendered', data=snap.version),
+            dbc.Row(dbc.Col([
+                html.P("Periode"),
+                dcc.Dropdown(
+                    id='period_year',
+                    options=[{'label': str(year), 'value': year}
+                             for year in df_periods['year']],
+                    value=data.period,
+                    clearable=False
+                )
+            ], width=3)),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            id='indicators_rev',
+                            figure=figs['fig_ind_rev']
+                        )
+                    ),
+                    dbc.Col(
+                        dcc.Graph(
+                            id='indicators_profit',
+                            figure=figs['fig_ind_profit']
+                        )
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            id='indicators_rev_other',
+                            figure=figs['fig_ind_rev_alt']
+                        )
+                    ),
                     dbc.Col([
-                        dbc.Button("Termin vereinbaren",
-                                   href="mailto:kontakt@pschwan.de",
-                                   color="danger", block=True),
-                        dbc.Button("Was ist ein Data Product?",
-                                   href="https://www.pschwan.de/digitalisierung/was-ist-das-ein-data-product", target="_blank", color="secondary", outline=True, block=True),
-                        dbc.Button("Download Data-driven Business Model",
-                                   href="https://pschwan.de/blog/uploads/Data-driven%20Business%20Model.pdf", target="_blank", color="secondary", outline=True, block=True),
+                        dcc.Graph(
+                            id='indicators_profit_other',
+                            figure=figs['fig_ind_profit_alt']
+                        ),
+                        dcc.Graph(
+                            id='indicators_profit_trend',
+                            figure=shell(figs['fig_ind_profit_trend'])
+                        ),
                     ]),
-                ]),
-            ],
-            style=jumbo_style
-        ),
-        dbc.Row(dbc.Col(html.Hr()), style=ma_top),
-        dbc.Row([
-            dbc.Col(
-                html.H2("Detaillierte Übersichten - Zusammenhänge identifizieren",
-                        className="display-4")
+                ]
             ),
-            dbc.Col(dbc.Alert(dcc.Markdown('''
-                    #### Überblick behalten:
-                    - Details strukturieren, z.B.: in Tabs
-                    - Selektieren und Aggregieren der Informationen durch Slider und Drop-Downs
-                    - Ja, man könnte die Tabelle per "Download" in Excel weiter nutzen
-                    '''), color="secondary"))
-        ]),
-        dbc.Tabs([
-            dbc.Tab(dbc.Card(
-                dbc.CardBody(
-                    [
+            dbc.Row(dbc.Col(html.Hr())),
+            dbc.Row([
+                dbc.Col(html.H2("KPI Charts - Zusammenhänge und Beziehungen schnell erfassen",
+                                className="display-4")),
+                dbc.Col(dbc.Alert(dcc.Markdown('''
+                        #### Interaktiv - probieren Sie es aus:
+                        - Die Slider anpassen und die **Jahre auswählen**
+                        - Die Maus über die Graphen bewegen und die **out-of-the-box Features** kennenlernen
+                        - Zum Beispiel: Zoomen oder die Charts als Grafik speichern!
+                        - *Tipp:* der Home-Button bzw. das kleine Haus bringt Sie auch im Tablet Modus wieder zum ursprünglichen Graphen
+                        '''), color="danger"))
+            ]),
+            dbc.Row(
+                [
+                    dbc.Col([
+                        dcc.Graph(
+                            id='umsatz_bar',
+                            figure=shell(figs['fig_bar'])
+                        ),
                         dcc.RangeSlider(
-                            id='year_prd_qty',
-                            min=df_prd_grp_quantity['Year'].min(),
-                            max=df_prd_grp_quantity['Year'].max(),
-                            value=[df_prd_grp_quantity['Year'].max(
-                            ) - 1, df_prd_grp_quantity['Year'].max()],
+                            id='year_umsatz_bar',
+                            min=df_sql_data['row_year'].min(),
+                            max=df_sql_data['row_year'].max(),
+                            value=[df_sql_data['row_year'].min(
+                            ), df_sql_data['row_year'].max()],
                             marks={str(year): str(year)
-                                   for year in df_prd_grp_quantity['Year'].unique()},
+                                   for year in df_sql_data['row_year'].unique()},
                             step=None
                         ),
-                        dcc.Dropdown(
-                            id='dd_prd_qty',
-                            options=[{'label': k, 'value': k}
-                                     for k in df_prd_grp_quantity['Product Group'].unique()],
-                            value=['Pizza'],
-                            multi=True,
-                            placeholder='Alle Produkte - selektiere eine Produktgruppe'
-                        ),
+                        # Klick auf ein Jahr -> Monate
+                        drill_graph('drill_umsatz_bar'),
+                    ]),
+                    dbc.Col([
                         dcc.Graph(
-                            id='fig_prd_grp_quantity',
-                            figure=fig_prd_grp_quantity
+                            id='umsatz_line',
+                            figure=shell(figs['fig_line'])
                         ),
-
-                        html.H3("2021 YTD KPIs",
-                                className="display-4", style=ma_top),
-                        dbc.Table.from_dataframe(
-                            df_prd_grp_kpi, striped=True, bordered=True, hover=True, size="sm")
-                    ]
-                ),
-                className="mt-3",
-            ), label="Übersicht Produkte"),
-
-
-            # zweiter Tab
-            dbc.Tab(dbc.Card(
-                dbc.CardBody([
-                    dbc.Row(
-                        [
-                            dbc.Col(
-                                dbc.Card(dcc.Graph(
-                                    id='fig_cust_prog',
-                                    figure=fig_cust_prog
-                                ), body=True, className="mt-3"), width=6
-                            ),
-                            dbc.Col(
-                                dbc.Card(
-                                    dcc.Graph(
-                                        id='fig_newsletter',
-                                        figure=fig_newsletter
-                                    ), body=True, className="mt-3"), width=6
-                            ),
-                        ]
+                        dcc.RangeSlider(
+                            id='year_umsatz_line',
+                            min=df_sql_data['row_year'].min(),
+                            max=df_sql_data['row_year'].max(),
+                            value=[df_sql_data['row_year'].min(
+                            ), df_sql_data['row_year'].max()],
+                            marks={str(year): str(year)
+                                   for year in df_sql_data['row_year'].unique()},
+                            step=None
+                        )
+                    ])
+                ]
+            ),
+            dbc.Row(dbc.Col(html.Hr()), style=ma_top),
+            dbc.Jumbotron(
+                [
+                    html.H1("Danke, wir benutzen Excel!", className="display-3"),
+                    html.P(
+                        "Daten unterschiedlichster Quellen zur Verfügung stellen, integrieren und nutzen - auch in Excel.",
+                        className="lead",
                     ),
-                    html.Hr(),
-                    html.H3("Programm Kundenbindung KPIs",
-                            className="display-4"),
+                    html.Hr(className="my-2"),
                     dbc.Row([
                         dbc.Col([
-                            html.P("Filter Programm Kundenbindung ja/nein"),
-                            dcc.Dropdown(
-                                id='dd_cust_prog',
-                                options=[{'label': 'ja', 'value': 1},
-                                         {'label': 'nein', 'value': 0}],
-                                value=[1, 0],
-                                multi=True,
-                                placeholder='Alle angezeigt - selektiere ja/nein'
-                            )
+                            dcc.Markdown('''
+                                #### IT Unterstützung, die zu Ihren Herausforderungen passt:
+                                - Wo entstehen die täglichen Herausforderungen?
+                                - Welche Daten und Informationen wären für die Problemlösung nützlich?
+                                - Sind diese Daten verfügbar? Warum nicht?
+                                - "Wir haben keine interne IT..."
+                                '''),
+                            html.P("Lassen Sie uns im persönlichen Gespräch Ihre Fragen und Anforderungen klären. Im Blog und in den Unterlagen zum Download finden Sie weitere Informationen."),
                         ]),
                         dbc.Col([
-                            html.P("Filter Newsletter ja/nein"),
-                            dcc.Dropdown(
-                                id='dd_newsl',
-                                options=[{'label': 'ja', 'value': 1},
-                                         {'label': 'nein', 'value': 0}],
-                                value=[1, 0],
-                                multi=True,
-                                placeholder='Alle angezeigt - selektiere ja/nein'
-                            )
-                        ])
+                            dbc.Button("Termin vereinbaren",
+                                       href="mailto:kontakt@pschwan.de",
+                                       color="danger", block=True),
+                            dbc.Button("Was ist ein Data Product?",
+                                       href="https://www.pschwan.de/digitalisierung/was-ist-das-ein-data-product", target="_blank", color="secondary", outline=True, block=True),
+                            dbc.Button("Download Data-driven Business Model",
+                                       href="https://pschwan.de/blog/uploads/Data-driven%20Business%20Model.pdf", target="_blank", color="secondary", outline=True, block=True),
+                        ]),
                     ]),
-                    dbc.Row(dbc.Col(html.Br())),
-                    dbc.Row([
-                        dbc.Col(
-                            dcc.Graph(
-                                id='fig_sales_qty',
-                                figure=fig_sales_qty)),
-                    ]
-                    ),
-                    html.Hr(),
-                    html.H3("YTD 2021 KPIs", className="display-4"),
-                    dbc.Table.from_dataframe(
-                        df_sales_cust, id='tbl_cust_ytd', striped=True, bordered=True, hover=True, size="sm")
-                ])
-            ), label="Übersicht Kunden")
-        ]),
-        dbc.Jumbotron(
-            [
-                html.H1("IT Know-How as a Service", className="display-3"),
-                html.P(
-                    "IT Projekte erfolgreich umsetzen",
-                    className="lead",
+                ],
+                style=jumbo_style
+            ),
+            dbc.Row(dbc.Col(html.Hr()), style=ma_top),
+            dbc.Row([
+                dbc.Col(
+                    html.H2("Detaillierte Übersichten - Zusammenhänge identifizieren",
+                            className="display-4")
                 ),
-                html.Hr(className="my-2"),
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Markdown('''
-                            #### IT Unterstützung für Ihre Projekte und täglichen Herausforderungen:
-                            - Sie benötigen IT Unterstützung?
-                            - Sie **wissen gar nicht genau wobei** und haben kein Projekt?
-                            - Sie können den Projektumfang nicht abschätzen?
-                            - Die **Herausforderungen entstehen in der täglichen Arbeit**?
-                            '''),
-                        html.P("Lassen Sie uns im persönlichen Gespräch Ihre Fragen und Anforderungen klären. Im Blog und in den Unterlagen zum Download finden Sie weitere Informationen."),
-                    ]),
-                    dbc.Col([
-                        dbc.Button("Termin vereinbaren",
-                                   href="mailto:kontakt@pschwan.de",
-                                   color="danger", block=True),
-                        dbc.Button("IT Know-How as a Service - mehr erfahren",
-                                   href="https://www.pschwan.de/it-know-how-und-projekte-as-a-service", target="_blank", color="secondary", outline=True, block=True),
-                        dbc.Button("Was ist ein Data Product?",
-                                   href="https://www.pschwan.de/digitalisierung/was-ist-das-ein-data-product", target="_blank", color="secondary", outline=True, block=True),
+                dbc.Col(dbc.Alert(dcc.Markdown('''
+                        #### Überblick behalten:
+                        - Details strukturieren, z.B.: in Tabs
+                        - Selektieren und Aggregieren der Informationen durch Slider und Drop-Downs
+                        - Ja, man könnte die Tabelle per "Download" in Excel weiter nutzen
+                        '''), color="secondary"))
+            ]),
+            *details_tabs(frames, figs),
+            dbc.Jumbotron(
+                [
+                    html.H1("IT Know-How as a Service", className="display-3"),
+                    html.P(
+                        "IT Projekte erfolgreich umsetzen",
+                        className="lead",
+                    ),
+                    html.Hr(className="my-2"),
+                    dbc.Row([
+                        dbc.Col([
+                            dcc.Markdown('''
+                                #### IT Unterstützung für Ihre Projekte und täglichen Herausforderungen:
+                                - Sie benötigen IT Unterstützung?
+                                - Sie **wissen gar nicht genau wobei** und haben kein Projekt?
+                                - Sie können den Projektumfang nicht abschätzen?
+                                - Die **Herausforderungen entstehen in der täglichen Arbeit**?
+                                '''),
+                            html.P("Lassen Sie uns im persönlichen Gespräch Ihre Fragen und Anforderungen klären. Im Blog und in den Unterlagen zum Download finden Sie weitere Informationen."),
+                        ]),
+                        dbc.Col([
+                            dbc.Button("Termin vereinbaren",
+                                       href="mailto:kontakt@pschwan.de",
+                                       color="danger", block=True),
+                            dbc.Button("IT Know-How as a Service - mehr erfahren",
+                                       href="https://www.pschwan.de/it-know-how-und-projekte-as-a-service", target="_blank", color="secondary", outline=True, block=True),
+                            dbc.Button("Was ist ein Data Product?",
+                                       href="https://www.pschwan.de/digitalisierung/was-ist-das-ein-data-product", target="_blank", color="secondary", outline=True, block=True),
+                        ]),
                     ]),
-                ]),
-            ],
-            style=jumbo_style
-        ),
-    ]
-)
+                ],
+                style=jumbo_style
+            ),
+            *stores,
+            *push_components(snap.version),
+        ]
+    )
+
 
 ########################################
 # Callbacks für DropDowns und Filter
 
 
+if use_clientside:
+    # Filtern im Browser (clientside.py, assets/charts.js)
+    register_callbacks(app)
+else:
+    @app.callback(
+        Output('umsatz_bar', 'figure'),
+        Input('year_umsatz_bar', 'value'))
+    @fig_cache.cached('umsatz_bar', data_version)
+    def update_figure(selected_year):
+        with metrics.stage('filter'):
+            filtered_df = store.indexes()['df_sql_data'].select(
+                selected_year[0], selected_year[1])
+
+        with metrics.stage('figure'):
+            fig_bar = px.bar(filtered_df, x="row_year", y="deckungsbeitrag",
+                             color="forecast", barmode="group", labels=labels,
+                             title="Deckungsbeitrag Plan/Ist")
+
+            fig_bar.update_xaxes(type='category')
+            fig_bar.update_layout(transition_duration=500)
+
+        return fig_bar
+
+
+    @app.callback(
+        Output('umsatz_line', 'figure'),
+        Input('year_umsatz_line', 'value'))
+    @fig_cache.cached('umsatz_line', data_version)
+    def update_figure(selected_year):
+        with metrics.stage('filter'):
+            filtered_df = store.indexes()['df_sql_data'].select(
+                selected_year[0], selected_year[1])
+
+        with metrics.stage('figure'):
+            fig_line = px.line(filtered_df, x='row_year', y='umsatz',
+                               color='forecast', labels=labels,
+                               title='Umsatz Plan/Ist')
+
+            fig_line.update_xaxes(type='category')
+            fig_line.update_layout(transition_duration=500)
+
+        return fig_line
+
+
+    # Dropdown
+    @app.callback(
+        Output('fig_prd_grp_quantity', 'figure'),
+        Input('dd_prd_qty', 'value'),
+        Input('year_prd_qty', 'value')
+    )
+    @fig_cache.cached('fig_prd_grp_quantity', data_version)
+    def update_output(value, selected_year):
+        # wenn kein Wert in DropDown ausgewählt oder alle gelöscht -> alle Gruppen
+        with metrics.stage('filter'):
+            filter_df_prd_grp_qty = store.indexes()['df_prd_grp_quantity'].select(
+                selected_year[0], selected_year[1], keys=value or None)
+
+        with metrics.stage('figure'):
+            fig_prd_grp_quantity = px.bar(with_labels(prd_qty_bars(filter_df_prd_grp_qty), 'syear'),
+                                          x="Descr", y="Sum QTY",
+                                          color="syear", barmode="group", labels=labels,
+                                          title="Menge pro Produkt")
+
+        return fig_prd_grp_quantity
+
+
 @app.callback(
-    Output('umsatz_bar', 'figure'),
-    Input('year_umsatz_bar', 'value'))
-def update_figure(selected_year):
-    filtered_df = df_sql_data[(df_sql_data.year >= selected_year[0]) & (
-        df_sql_data.year <= selected_year[1])]
+    Output('fig_sales_qty', 'figure'),
+    Input('dd_cust_prog', 'value'),
+    Input('dd_newsl', 'value')
+)
+@fig_cache.cached('fig_sales_qty', data_version)
+def update_data(cust, news):
+    # falls nichts ausgewählt, Default Werte
+    if len(cust) == 0:
+        cust = [0, 1]
+    if len(news) == 0:
+        news = [0, 1]
 
-    fig_bar = px.bar(filtered_df, x="row_year", y="deckungsbeitrag",
-                     color="forecast", barmode="group", labels=labels,
-                     title="Deckungsbeitrag Plan/Ist")
+    with metrics.stage('filter'):
+        filtered_df = store.indexes()['df_sales_qty'].select(
+            keys=pairs(cust, news))
 
-    fig_bar.update_layout(transition_duration=500)
+    with metrics.stage('figure'):
+        fig_sales_qty = px.bar(with_labels(sales_qty_bars(filtered_df), 'syear', 'smonth'),
+                               x="smonth",
+                               y="Sum QTY", color="syear", barmode="group", labels=labels,
+                               title="Menge pro Kunde")
+
+    return fig_sales_qty
 
-    return fig_bar
 
+########################################
+# Drill-down per Klick, Abfrage erst auf Anfrage (drilldown.py)
 
 @app.callback(
-    Output('umsatz_line', 'figure'),
-    Input('year_umsatz_line', 'value'))
-def update_figure(selected_year):
-    filtered_df = df_sql_data[(df_sql_data.year >= selected_year[0]) & (
-        df_sql_data.year <= selected_year[1])]
+    Output('drill_umsatz_bar', 'figure'),
+    Output('drill_umsatz_bar', 'style'),
+    Input('umsatz_bar', 'clickData'))
+def drill_year(click_data):
+    year = clicked(click_data)
+    if year is None:
+        raise PreventUpdate
+
+    with metrics.stage('query'):
+        df = drill.get('year_months', data.load_year_months, str(year))
+
+    with metrics.stage('figure'):
+        fig = px.bar(df, x='row_month', y='umsatz', color='forecast', barmode='group',
+                     labels=labels, title='Umsatz %s pro Monat' % year)
+
+    return fig, VISIBLE
+
+
+# Tabs erst rendern, wenn sie aktiv werden
+if lazy_layout:
+    @app.callback(
+        Output('tab_content', 'children'),
+        Input('tabs_details', 'active_tab'))
+    def render_tab(active_tab):
+        snap = store.snapshot()
+        if active_tab == 'tab_customers':
+            return customers_tab(snap.frames, page_figures(snap))
+        return products_tab(snap.frames, page_figures(snap))
+
+
+# Indikatoren der gewählten Periode, beim Seitenaufbau kommen sie aus page_figures,
+# nur der Monatsverlauf (im Layout ohne Daten) per erstem Aufruf.
+# Nach einer neuen Version (push_version) nur, wenn die angezeigte Version älter ist,
+# der Monatsverlauf bekommt dann möglichst nur die neuen Punkte.
+@app.callback(
+    Output('indicators_rev', 'figure'),
+    Output('indicators_profit', 'figure'),
+    Output('indicators_rev_other', 'figure'),
+    Output('indicators_profit_other', 'figure'),
+    Output('indicators_profit_trend', 'figure'),
+    Output('indicators_profit_trend', 'extendData'),
+    Output('push_rendered', 'data'),
+    Output('push_notice', 'is_open'),
+    Input('period_year', 'value'),
+    Input('push_version', 'data'),
+    State('push_rendered', 'data'))
+def update_indicators(year, latest, rendered):
+    version = data_version()
+    trigger = dash.callback_context.triggered[0]['prop_id']
+    pushed = trigger == 'push_version.data'
+    # dieser Worker kennt die gemeldete Version noch nicht, kein Rückschritt im Browser
+    if pushed and rendered == version or latest is not None and version < latest:
+        raise PreventUpdate
+    year = int(year)
+    figs = indicator_figures(year)
+    if trigger == '.':
+        # Seitenaufbau: Indikatoren sind schon im Layout
+        return [dash.no_update] * 4 + [figs['fig_ind_profit_trend']] + [dash.no_update] * 3
+
+    trend, extend = figs['fig_ind_profit_trend'], dash.no_update
+    if pushed:
+        old = trends.get((rendered, year))
+        diff = None if old is None else trend_extension(
+            old, period_frames(year)['df_ind_scatter'])
+        if diff is not None:
+            trend, extend = dash.no_update, diff
+        metrics.inc('pydash_push_updates_total', trend='figure' if diff is None else 'extend')
+    return [figs['fig_ind_rev'], figs['fig_ind_profit'], figs['fig_ind_rev_alt'],
+            figs['fig_ind_profit_alt'], trend, extend, version, pushed]
+
+
+@fig_cache.cached('indicators', data_version)
+def indicator_figures(year):
+    with metrics.stage('filter'):
+        frames = period_frames(year)
+        trends.put((data_version(), year), frames['df_ind_scatter'])
+
+    with metrics.stage('figure'):
+        figs = build_indicators(frames, year)
+
+    return {name: fig.to_plotly_json() for name, fig in figs.items()}
+
+
+def period_table(dataset):
+    def frame(year, pushed=None):
+        if pushed is not None and data_version() < pushed:
+            raise PreventUpdate
+        key = (data_version(), data.tenant, year, dataset)
+        try:
+            return key, period_kpis(dataset, year)
+        except Exception:
+            # Periode ohne (gecachte) API Antwort: leere Tabelle, der Rest der Seite läuft
+            logger.warning('kpi table %s for %s unavailable', dataset, year, exc_info=True)
+            return key + ('unavailable',), store.snapshot().frames[dataset].iloc[:0]
+    return frame
+
+
+# KPI Tabellen der gewählten Periode, nach einer neuen Version die aktuelle Seite neu
+register_table(app, 'tbl_prd_kpi', period_table('df_prd_grp_kpi'),
+               Input('period_year', 'value'), Input('push_version', 'data'))
+register_table(app, 'tbl_cust_ytd', period_table('df_sales_cust'),
+               Input('period_year', 'value'), Input('push_version', 'data'))
 
-    fig_line = px.line(filtered_df, x='row_year', y='umsatz',
-                       color='forecast', labels=labels,
-                       title='Umsatz Plan/Ist')
 
-    fig_line.update_layout(transition_duration=500)
+########################################
+# Start
+# Der Import von app.py lädt keine Daten und öffnet keine Verbindungen. create_app()
+# lädt die Datasets und baut die Figures vor. Mit gunicorn preload_app passiert das
+# einmal im Master, die Worker erben alles per fork und after_fork() (gunicorn.conf.py)
+# baut nur die Verbindungen neu auf und startet den Refresh Thread.
+
+boot_times = {}
 
-    return fig_line
 
+def boot():
+    if boot_times:
+        return
+    times = {'import': time.perf_counter() - import_start}
+    start = time.perf_counter()
+    # vom Snapshot auf Platte, falls vorhanden (cache.py), sonst aus den Quellen
+    store.warm_start()
+    times['data'] = time.perf_counter() - start
+    start = time.perf_counter()
+    # erst mit Daten setzen, ohne suppress_callback_exceptions ruft Dash das Layout sofort auf
+    app.layout = serve_layout
+    # erster Seitenaufruf ohne Figure Aufbau, bei preload für alle Worker
+    page_figures(store.snapshot())
+    times['figures'] = time.perf_counter() - start
+    times['total'] = time.perf_counter() - import_start
+    boot_times.update(times)
 
-# Dropdown
-@app.callback(
-    Output('fig_prd_grp_quantity', 'figure'),
-    Input('dd_prd_qty', 'value'),
-    Input('year_prd_qty', 'value')
-)
-def update_output(value, selected_year):
-    filtered_df = df_prd_grp_quantity[(df_prd_grp_quantity.Year >= selected_year[0]) & (
-        df_prd_grp_quantity.Year <= selected_year[1])]
-
-    # wenn kein Wert in DropDown ausgewählt oder alle gelöscht
-    if len(value) > 0:
-        filter_df_prd_grp_qty = filtered_df[filtered_df['Product Group'].isin(
-            value)]
-    else:
-        filter_df_prd_grp_qty = filtered_df
-
-    fig_prd_grp_quantity = px.bar(filter_df_prd_grp_qty, x="Descr", y="Sum QTY",
-                                  color="syear", barmode="group", labels=labels,
-                                  title="Menge pro Produkt")
+    for phase, seconds in boot_times.items():
+        metrics.gauge('pydash_boot_seconds', lambda seconds=seconds: seconds, phase=phase)
+    logger.info('boot: ' + ', '.join('%s %.2fs' % item for item in boot_times.items()))
 
-    return fig_prd_grp_quantity
 
+def after_fork():
+    # Pool Connections und HTTP Sockets nicht mit dem Master teilen
+    data.db.reset()
+    data.api.reset()
+    store.start()
 
-@app.callback(
-    Output('fig_sales_qty', 'figure'),
-    Input('dd_cust_prog', 'value'),
-    Input('dd_newsl', 'value')
-)
-def update_data(cust, news):
-    # falls nichts ausgewählt, Default Werte
-    if len(cust) == 0:
-        cust = [0, 1]
-    if len(news) == 0:
-        news = [0, 1]
 
-    filtered_df = df_sales_qty[(df_sales_qty['Customer Program'].isin(
-        cust)) & (df_sales_qty['Newsletter'].isin(news))]
+def create_app():
+    boot()
+    return server
 
-    fig_sales_qty = px.bar(filtered_df, x="smonth",
-                           y="Sum QTY", color="syear", barmode="group", labels=labels,
-                           title="Menge pro Kunde")
 
-    return fig_sales_qty
+# "app:server" ohne Factory: beim ersten Request laden, vor Dash's Layout Prüfung
+server.before_first_request_funcs.insert(0, boot)
+
+
+@server.before_request
+def sync_data():
+    # neue Version eines anderen Workers vor Layout und Callbacks übernehmen
+    store.sync()
 
 
 ########################################
 # Server
 if __name__ == '__main__':
+    boot()
+    store.start()
     app.run_server(host='0.0.0.0', port=8050, debug=True)
     # app.run_server(debug=True)
@@ -0,0 +1,50 @@
+// Clientside Filter für die Jahres-Slider und die Produktgruppen (clientside.py)
+(function () {
+    function filterFigure(spec, figure, range, groups) {
+        var cols = spec.columns;
+        var n = cols[spec.x].length;
+        var wanted = groups && groups.length ? new Set(groups) : null;
+        var series = {};
+
+        for (var i = 0; i < n; i++) {
+            var r = cols[spec.range][i];
+            if (r < range[0] || r > range[1]) {
+                continue;
+            }
+            if (wanted && !wanted.has(cols[spec.group][i])) {
+                continue;
+            }
+            var name = String(cols[spec.color][i]);
+            if (!series[name]) {
+                series[name] = {x: [], y: []};
+            }
+            series[name].x.push(cols[spec.x][i]);
+            series[name].y.push(cols[spec.y][i]);
+        }
+
+        // Reihenfolge und Style wie in der serverseitigen Figure
+        var data = [];
+        spec.order.forEach(function (name) {
+            if (series[name]) {
+                data.push(Object.assign({}, spec.traces[name], series[name]));
+                delete series[name];
+            }
+        });
+        Object.keys(series).forEach(function (name) {
+            data.push(Object.assign({type: spec.type, name: name}, series[name]));
+        });
+
+        return {data: data, layout: Object.assign({}, figure.layout, spec.layout)};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        charts: {
+            range_figure: function (range, spec, figure) {
+                return filterFigure(spec, figure, range, null);
+            },
+            group_range_figure: function (groups, range, spec, figure) {
+                return filterFigure(spec, figure, range, groups);
+            }
+        }
+    });
+})();
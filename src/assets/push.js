@@ -0,0 +1,52 @@
+// Dataset Version vom Server (push.py): Server-Sent Events, Fallback Polling
+// Der dcc.Interval Tick (push_tick) gibt nur die zuletzt gemeldete Version weiter.
+(function () {
+    var state = {version: null, source: null, polling: false, lastPoll: 0};
+
+    function connect(url) {
+        if (!window.EventSource) {
+            state.polling = true;
+            return;
+        }
+        state.source = new EventSource(url + 'events');
+        state.source.addEventListener('version', function (e) {
+            state.version = JSON.parse(e.data).version;
+        });
+        state.source.onerror = function () {
+            // EventSource verbindet sich selbst neu, nur bei CLOSED auf Polling wechseln
+            if (state.source.readyState === EventSource.CLOSED) {
+                state.polling = true;
+            }
+        };
+    }
+
+    function poll(url, every) {
+        var now = Date.now();
+        if (now - state.lastPoll < every) {
+            return;
+        }
+        state.lastPoll = now;
+        fetch(url + 'version', {cache: 'no-store'})
+            .then(function (r) { return r.json(); })
+            .then(function (d) { state.version = d.version; })
+            .catch(function () {});
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        push: {
+            version: function (n, config, current) {
+                if (config.mode === 'sse' && !state.source && !state.polling) {
+                    connect(config.url);
+                }
+                if (config.mode !== 'sse' || state.polling) {
+                    poll(config.url, config.poll_ms);
+                }
+                // nur vorwärts: ein Poll/Stream auf einem älteren Worker setzt nicht zurück
+                if (state.version === null || (current !== null && state.version <= current)) {
+                    return window.dash_clientside.no_update;
+                }
+                return state.version;
+            }
+        }
+    });
+})();
@@ -0,0 +1,151 @@
+# Gemeinsamer Dataset Cache für alle gunicorn Worker
+# Ein Worker lädt (File Lock), schreibt jedes Dataset als Feather Datei in ein
+# versioniertes Verzeichnis und alle Worker lesen die Dateien per mmap. Die Dateien sind
+# unkomprimiert und haben einen Chunk pro Spalte: numerische Spalten ohne Nullwerte
+# zeigen dann direkt in den Page Cache und werden zwischen den Workern geteilt.
+# Strings (object) und Spalten mit Nullwerten kopiert jeder Worker in seinen Heap, ebenso
+# baut jeder Worker die abgeleiteten Strukturen (Indizes, Figures) selbst - der Speicher pro
+# Worker sinkt, wächst aber weiter mit der Zahl der Worker (bench/bench_memory.py).
+# Der Cache überlebt Neustarts: ein neuer Prozess startet vom letzten Snapshot
+# (read()), egal wie alt, und prüft die Quellen danach im Hintergrund. Ergibt ein
+# Reload dieselben Daten (Fingerprints pro Dataset), bleibt die Version gleich.
+#
+# CACHE_DIR/
+#   meta.json           Format, aktuelle Version, Zeitstempel, Datasets, Fingerprints
+#   v<version>/<name>.feather
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+import pandas as pd
+from pyarrow import feather
+
+logger = logging.getLogger(__name__)
+
+# bei inkompatiblen Änderungen am Dateiformat erhöhen, alte Snapshots werden ignoriert
+# 2: unkomprimiert, ein Chunk (LZ4 Snapshots aus Format 1 werden neu geschrieben)
+FORMAT = 2
+
+
+def fingerprint(df):
+    # Inhalt, Spalten und Typen eines Datasets
+    h = hashlib.sha1(json.dumps([[str(c) for c in df.columns],
+                                 [str(t) for t in df.dtypes],
+                                 [str(n) for n in df.index.names]]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class SharedCache:
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def meta(self):
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('format') == FORMAT else None
+
+    def mtime(self):
+        # billiger Check pro Request, ob ein anderer Prozess eine Version geschrieben hat
+        try:
+            return os.stat(self._meta_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _write_meta(self, meta):
+        with open(self._meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(self._meta_path + '.tmp', self._meta_path)
+
+    def is_fresh(self, meta):
+        return meta is not None and time.time() - meta['written_at'] < self.ttl
+
+    def read(self, meta=None):
+        meta = meta or self.meta()
+        if meta is None:
+            return None
+        vdir = os.path.join(self.path, 'v%d' % meta['version'])
+        frames = {}
+        for name, info in meta['datasets'].items():
+            table = feather.read_table(os.path.join(vdir, name + '.feather'),
+                                       memory_map=True)
+            # split_blocks: numerische Spalten ohne Kopie aus dem mmap übernehmen, geht nur
+            # bei unkomprimierten Dateien mit einem Chunk (write())
+            df = table.to_pandas(split_blocks=True)
+            if info['index']:
+                df = df.set_index(info['index'])
+            frames[name] = df
+        return meta['version'], frames, meta['written_at']
+
+    def write(self, frames):
+        meta = self.meta()
+        fingerprints = {name: fingerprint(df) for name, df in frames.items()}
+        if meta is not None and meta.get('fingerprints') == fingerprints:
+            # Quellen unverändert: nur den Zeitstempel erneuern, Version und Dateien bleiben
+            meta['written_at'] = time.time()
+            self._write_meta(meta)
+            logger.info('cache version %s unchanged', meta['version'])
+            return meta
+        changed = sorted(n for n, fp in fingerprints.items()
+                         if meta is None or meta.get('fingerprints', {}).get(n) != fp)
+
+        version = meta['version'] + 1 if meta else 1
+        vdir = os.path.join(self.path, 'v%d' % version)
+        tmp = vdir + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        datasets = {}
+        for name, df in frames.items():
+            # Feather braucht einen Default Index, z.B. df_indicator ist nach forecast indiziert
+            index = [n for n in df.index.names if n is not None]
+            if index:
+                df = df.reset_index()
+            # komprimiert würde jeder Leser in seinen Heap entpacken, mehrere Chunks
+            # würde to_pandas zusammenkopieren
+            feather.write_feather(df.reset_index(drop=True),
+                                  os.path.join(tmp, name + '.feather'),
+                                  compression='uncompressed', chunksize=max(len(df), 1))
+            datasets[name] = {'index': index, 'rows': len(df)}
+        os.replace(tmp, vdir)
+
+        new_meta = {'format': FORMAT, 'version': version, 'written_at': time.time(),
+                    'datasets': datasets, 'fingerprints': fingerprints}
+        self._write_meta(new_meta)
+
+        # ältere Versionen entfernen, die vorherige bleibt für laufende Leser
+        for entry in os.listdir(self.path):
+            if entry.startswith('v') and entry[1:].isdigit() and int(entry[1:]) < version - 1:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+        logger.info('cache version %s written, changed: %s', version, ', '.join(changed))
+        return new_meta
+
+    def get_or_load(self, loader):
+        meta = self.meta()
+        if self.is_fresh(meta):
+            return self.read(meta)
+
+        # nur ein Worker lädt, die anderen warten und lesen danach den Cache
+        with open(os.path.join(self.path, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                meta = self.meta()
+                if not self.is_fresh(meta):
+                    meta = self.write(loader())
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return self.read(meta)
@@ -0,0 +1,62 @@
+# Clientside Filter für die Jahres-Slider und die Produktgruppen
+# Die Chart-Daten gehen einmal pro Seitenaufruf in einen dcc.Store, Filtern und
+# Figure-Aufbau passieren im Browser (assets/charts.js) - Slider-Bewegungen
+# kosten keinen Request und keine CPU auf dem Server.
+
+import dash_core_components as dcc
+from dash.dependencies import ClientsideFunction, Input, Output, State
+
+
+def chart_spec(fig, df, x, y, color, range_col, group_col=None, layout=None):
+    # Traces der serverseitig gebauten Figure als Vorlage (Farben, Hover, Legende),
+    # x/y werden im Browser pro Farbgruppe neu befüllt
+    # fig: go.Figure oder bereits serialisiertes Dict
+    if hasattr(fig, 'to_plotly_json'):
+        fig = fig.to_plotly_json()
+    traces = {}
+    for trace in fig['data']:
+        trace = {k: v for k, v in trace.items() if k not in ('x', 'y')}
+        traces[str(trace.get('name'))] = trace
+
+    cols = dict.fromkeys(c for c in (x, y, color, range_col, group_col) if c)
+    return {
+        'x': x,
+        'y': y,
+        'color': color,
+        'range': range_col,
+        'group': group_col,
+        'type': fig['data'][0].get('type', 'bar') if fig['data'] else 'bar',
+        'order': list(traces),
+        'traces': traces,
+        'layout': layout or {},
+        # spaltenweise, kompakter als records
+        'columns': {c: df[c].tolist() for c in cols},
+    }
+
+
+def spec_store(graph_id, spec):
+    return dcc.Store(id='spec_' + graph_id, data=spec)
+
+
+def register_callbacks(app):
+    app.clientside_callback(
+        ClientsideFunction('charts', 'range_figure'),
+        Output('umsatz_bar', 'figure'),
+        Input('year_umsatz_bar', 'value'),
+        State('spec_umsatz_bar', 'data'),
+        State('umsatz_bar', 'figure'))
+
+    app.clientside_callback(
+        ClientsideFunction('charts', 'range_figure'),
+        Output('umsatz_line', 'figure'),
+        Input('year_umsatz_line', 'value'),
+        State('spec_umsatz_line', 'data'),
+        State('umsatz_line', 'figure'))
+
+    app.clientside_callback(
+        ClientsideFunction('charts', 'group_range_figure'),
+        Output('fig_prd_grp_quantity', 'figure'),
+        Input('dd_prd_qty', 'value'),
+        Input('year_prd_qty', 'value'),
+        State('spec_fig_prd_grp_quantity', 'data'),
+        State('fig_prd_grp_quantity', 'figure'))
@@ -0,0 +1,246 @@
+# Laden der Datasets: MySQL (dp_view, customers) und deta.dev API
+# .env für die MySQL DB
+
+import datetime
+import functools
+import logging
+import os
+import time
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dotenv import load_dotenv
+
+import pandas as pd
+
+import metrics
+from api import ApiClient
+from db import Database, SQLiteDatabase
+from presentation import present
+from rollups import DailyRollup
+from schema import memory_report, typed
+
+logger = logging.getLogger(__name__)
+
+
+########################################
+# MySQL connection config
+
+load_dotenv()
+db_user = os.getenv("DB_USER")
+db_pw = os.getenv("DB_PW")
+env_db = os.getenv("DB")
+
+config = {
+    'user': db_user,
+    'password': db_pw,
+    'host': 'pschwan.de',
+    'database': env_db
+}
+
+# DB_BACKEND=sqlite + DB_PATH: lokale SQLite Datei statt MySQL (Tests, Benchmarks)
+if os.getenv("DB_BACKEND") == "sqlite":
+    db = SQLiteDatabase(os.getenv("DB_PATH"),
+                        batch_size=int(os.getenv("DB_BATCH_SIZE", "50000")))
+else:
+    db = Database(config,
+                  pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+                  timeout=int(os.getenv("DB_TIMEOUT", "10")),
+                  # Zeilen pro fetchmany Block
+                  batch_size=int(os.getenv("DB_BATCH_SIZE", "50000")))
+
+# gemeinsames Cache Verzeichnis (Datasets, API Responses, Rollups)
+cache_dir = os.getenv("CACHE_DIR", "/tmp/pydash-cache")
+os.makedirs(cache_dir, exist_ok=True)
+
+rollup = DailyRollup(db, os.path.join(cache_dir, 'rollup_daily.feather'),
+                     lookback_days=int(os.getenv("ROLLUP_LOOKBACK_DAYS", "7")))
+
+# Periode (Jahr) und Tenant beim Laden, andere Perioden auf Anfrage (load_period_*)
+period = int(os.getenv("PERIOD", "2021"))
+tenant = os.getenv("TENANT", "")
+# Jahre vor der Periode für die Umsatz Charts
+years_back = int(os.getenv("YEARS_BACK", "4"))
+
+# API endpoints, {year} = Periode
+url_product = '/sales/groupby/product/'
+url_cust_YTD = '/sales/groupby/customer/{year}/'
+url_cust_ymonth = '/sales/groupby/customer/month/'
+url_product_YTD = '/sales/groupby/product/{year}/'
+
+# Timeouts in Sekunden: pro HTTP Request und für das Laden einer Quelle
+api_timeout = float(os.getenv("API_TIMEOUT", "10"))
+load_timeout = float(os.getenv("LOAD_TIMEOUT", "60"))
+
+api = ApiClient(os.getenv("API_URL", "https://34hj8d.deta.dev"),
+                os.path.join(cache_dir, 'api'),
+                ttl=int(os.getenv("API_CACHE_TTL", "600")),
+                timeout=api_timeout)
+
+# Dauer pro Quelle beim letzten Laden, für den Startup Report
+last_report = {}
+
+
+########################################
+# SQL Data per Connection Pool + benannte Queries (db.py)
+
+def period_range(year, today=None):
+    # [1.1., Ende) der Periode, laufendes Jahr bis heute (YTD)
+    today = pd.Timestamp(today or datetime.date.today()).normalize()
+    start = pd.Timestamp(year=year, month=1, day=1)
+    return start, min(pd.Timestamp(year=year + 1, month=1, day=1), today)
+
+
+def period_indicators(year):
+    # Indikatoren einer Periode aus dem Tages-Rollup, ohne Abfrage an dp_view
+    start, end = period_range(year)
+    # Monatsverlauf inkl. heute, laufendes Jahr also bis morgen exklusiv
+    tomorrow = pd.Timestamp(datetime.date.today()) + pd.Timedelta(days=1)
+    _, month_end = period_range(year, today=tomorrow)
+    return {
+        # plan/ist auch ohne Zeilen, z.B. Periode ohne Ist Werte
+        'df_indicator': rollup.indicator_ytd(start, today=end).reindex(
+            ['plan', 'ist'], fill_value=0.0),
+        'df_ind_scatter': rollup.profit_by_month(start, 'plan', end=month_end),
+    }
+
+
+def load_dp_view(deadline=None):
+    # nur neue Tage aus dp_view aggregieren, Frames aus dem Rollup ableiten
+    rollup.update(deadline=deadline)
+
+    frames = period_indicators(period)
+    frames['df_sql_data'] = rollup.sales_by_year(str(period - years_back), str(period - 1))
+    # Perioden für die Auswahl
+    frames['df_periods'] = pd.DataFrame({'year': rollup.years()})
+    return frames
+
+
+def load_cust_prog():
+    return db.query('cust_prog_count')
+
+
+def load_newsletter():
+    return db.query('newsletter_count')
+
+
+########################################
+# API data
+
+def fetch(url, template=None):
+    # template: Endpoint ohne Periode/Tenant, Label der API Metriken
+    return pd.DataFrame(api.get_json(url, template=template))
+
+
+def period_url(url, year, tenant=''):
+    url = url.format(year=year)
+    if tenant:
+        url += '?' + urlencode({'tenant': tenant})
+    return url
+
+
+def load_prd_grp_quantity():
+    return fetch(url_product)
+
+
+def load_sales_cust():
+    # Effizienz Kundenprogramm und Newsletter
+    # yes/no Mapping für die Anzeige: presentation.MAPPINGS
+    return fetch(period_url(url_cust_YTD, period, tenant), url_cust_YTD)
+
+
+def load_sales_qty():
+    return fetch(url_cust_ymonth)
+
+
+def load_prd_grp_kpi():
+    # KPIs Produktgruppe
+    return fetch(period_url(url_product_YTD, period, tenant), url_product_YTD)
+
+
+########################################
+# Drill-down Abfragen, auf Anfrage statt beim Laden (drilldown.py)
+
+def load_year_months(year):
+    return typed('drill_year_month', db.query('drill_year_month', year=str(year)))
+
+
+########################################
+# Perioden auf Anfrage (app.py: periods), nur die periodenabhängigen Datasets
+# Indikatoren nur aus dem Rollup, die KPI Tabellen einzeln per API - ein Fehler der API
+# trifft nur die Tabelle. dp_view hat keine Tenant Spalte, der Tenant geht nur an die API.
+
+# Dataset -> Endpoint
+PERIOD_KPIS = {
+    'df_sales_cust': url_cust_YTD,
+    'df_prd_grp_kpi': url_product_YTD,
+}
+
+
+def load_period_indicators(year):
+    return {k: present(k, typed(k, v)) for k, v in period_indicators(year).items()}
+
+
+def load_period_kpis(dataset, tenant, year):
+    # über den API Cache auf Platte (zwei Dateien pro Periode und Tenant), ist die API
+    # nicht erreichbar, kommt die letzte gute Antwort
+    url = PERIOD_KPIS[dataset]
+    return present(dataset, typed(dataset, fetch(period_url(url, year, tenant), url)))
+
+
+# Name -> Loader, ein Loader liefert einen Frame oder ein Dict mehrerer Frames
+SOURCES = {
+    'dp_view': load_dp_view,
+    'df_cust_prog': load_cust_prog,
+    'df_newsletter': load_newsletter,
+    'df_prd_grp_quantity': load_prd_grp_quantity,
+    'df_sales_cust': load_sales_cust,
+    'df_sales_qty': load_sales_qty,
+    'df_prd_grp_kpi': load_prd_grp_kpi,
+}
+
+
+########################################
+# Alle Quellen parallel laden
+# Dauer ~ langsamste Quelle statt Summe aller Round Trips
+
+def _timed(func):
+    start = time.perf_counter()
+    df = func()
+    return df, time.perf_counter() - start
+
+
+def load_data():
+    start = time.perf_counter()
+    frames = {}
+    report = {}
+    # ein hängender dp_view Load schreibt nach dem Timeout keinen Rollup mehr
+    deadline = time.monotonic() + load_timeout
+    sources = dict(SOURCES, dp_view=functools.partial(SOURCES['dp_view'], deadline=deadline))
+    pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='load')
+    try:
+        futures = {name: pool.submit(_timed, func) for name, func in sources.items()}
+        for name, future in futures.items():
+            # per-source Timeout, gemessen ab Start des Ladens
+            remaining = load_timeout - (time.perf_counter() - start)
+            try:
+                df, report[name] = future.result(timeout=max(remaining, 0))
+            except FutureTimeout:
+                raise TimeoutError('loading %s took longer than %ss' % (name, load_timeout))
+            if not isinstance(df, dict):
+                df = {name: df}
+            # kompakte Typen (schema.py), dann Mappings für die Anzeige (presentation.py)
+            frames.update({k: present(k, typed(k, v)) for k, v in df.items()})
+    finally:
+        # nicht auf hängende Quellen warten
+        pool.shutdown(wait=False)
+
+    report['total'] = time.perf_counter() - start
+    for name, seconds in report.items():
+        metrics.observe('pydash_load_seconds', seconds, source=name)
+    last_report.clear()
+    last_report.update(report)
+    for name, seconds in report.items():
+        logger.info('load %-20s %.3fs', name, seconds)
+    memory_report(frames)
+    return frames
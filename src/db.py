@@ -0,0 +1,203 @@
+# Datenbank Zugriff: Connection Pool + benannte, parametrisierte Queries
+# Connections werden aus dem Pool geliehen, vor der Nutzung geprüft und bei
+# abgebrochener Verbindung wird die Query wiederholt. Ergebnisse werden mit
+# fetchmany blockweise gelesen (stream()), große Abfragen also nie komplett als Tupel.
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from mysql.connector import errors, pooling
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+QUERIES = {
+    # Tages-Rollup aus dp_view ab dem Watermark, Basis für Charts und Indikatoren (rollups.py)
+    'daily_rollup': """
+        SELECT row_dt, row_year, row_month, forecast,
+            SUM(umsatz) AS umsatz,
+            SUM(deckungsbeitrag) AS deckungsbeitrag,
+            SUM(gewinn) AS gewinn
+        FROM dp_view
+        WHERE row_dt >= %(since)s
+        GROUP BY row_dt, row_year, row_month, forecast
+        """,
+    # Drill-down: Monate eines Jahres, Klick auf umsatz_bar (drilldown.py)
+    'drill_year_month': """
+        SELECT row_month, forecast,
+            SUM(umsatz) AS umsatz,
+            SUM(deckungsbeitrag) AS deckungsbeitrag,
+            SUM(gewinn) AS gewinn
+        FROM dp_view
+        WHERE row_year = %(year)s
+        GROUP BY row_month, forecast
+        ORDER BY row_month, forecast
+        """,
+    # Customer Program PieChart
+    'cust_prog_count': """
+        SELECT COUNT(cj.cust_prog) AS 'Count', 'Yes' AS 'CustomerProg'
+        FROM customers AS cj
+        WHERE cj.cust_prog = 1
+        UNION ALL
+        SELECT COUNT(cn.cust_prog) AS 'Count', 'No' AS 'CustomerProg'
+        FROM customers AS cn
+        WHERE cn.cust_prog = 0
+        """,
+    # Newsletter Program PieChart
+    'newsletter_count': """
+        SELECT COUNT(cj.newsletter) AS 'Count', 'Yes' AS 'Newsletter'
+        FROM customers AS cj
+        WHERE cj.newsletter = 1
+        UNION ALL
+        SELECT COUNT(cn.newsletter) AS 'Count', 'No' AS 'Newsletter'
+        FROM customers AS cn
+        WHERE cn.newsletter = 0
+        """,
+}
+
+# abgebrochene Verbindungen -> neu verbinden und Query wiederholen
+RETRY_ERRORS = (errors.OperationalError, errors.InterfaceError)
+
+
+class Database:
+    def __init__(self, config, pool_size=4, retries=2, timeout=10, batch_size=50000):
+        self.config = config
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.retries = retries
+        self.timeout = timeout
+        self.timings = {}
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        # erst bei der ersten Query verbinden
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name='pydash', pool_size=self.pool_size,
+                    pool_reset_session=True, connection_timeout=self.timeout,
+                    **self.config)
+        return self._pool
+
+    def reset(self):
+        # Pool verwerfen, z.B. nach fork() oder wenn der Server weg war
+        self._pool = None
+
+    def prepare(self, sql):
+        # Queries sind im MySQL pyformat Stil geschrieben
+        return sql
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except errors.PoolError:
+                # alle Connections verliehen
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def connection(self):
+        cnx = self._checkout()
+        try:
+            # health check, tote Verbindung aus dem Pool wiederbeleben
+            if not cnx.is_connected():
+                cnx.reconnect(attempts=1)
+            yield cnx
+        finally:
+            # zurück in den Pool
+            cnx.close()
+
+    def cursor(self, cnx):
+        # ungepuffert: Zeilen kommen blockweise vom Server statt komplett in den Client
+        return cnx.cursor(buffered=False)
+
+    def stream(self, name, batch_size=None, **params):
+        # Ergebnis in DataFrames zu je batch_size Zeilen, der Speicher bleibt bei
+        # einem Block Python Tupel. Wiederholt wird nur, solange noch kein Block
+        # geliefert wurde.
+        sql = QUERIES[name]
+        batch_size = batch_size or self.batch_size
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            rows = 0
+            try:
+                with self.connection() as cnx:
+                    cur = self.cursor(cnx)
+                    try:
+                        if params:
+                            cur.execute(self.prepare(sql), params)
+                        else:
+                            cur.execute(self.prepare(sql))
+                        columns = [d[0] for d in cur.description]
+                        while True:
+                            batch = cur.fetchmany(batch_size)
+                            if not batch:
+                                break
+                            rows += len(batch)
+                            yield pd.DataFrame.from_records(batch, columns=columns)
+                            # Tupel freigeben, bevor der nächste Block kommt
+                            del batch
+                        if rows == 0:
+                            yield pd.DataFrame(columns=columns)
+                    finally:
+                        self.close_cursor(cnx, cur)
+            except RETRY_ERRORS:
+                metrics.inc('pydash_sql_errors_total', query=name)
+                if attempt == self.retries or rows:
+                    raise
+                logger.warning('query %s failed, retry %d', name, attempt + 1)
+                continue
+            self.timings[name] = time.perf_counter() - start
+            metrics.observe('pydash_sql_seconds', self.timings[name], query=name)
+            metrics.inc('pydash_sql_rows_total', rows, query=name)
+            logger.info('query %s: %d rows in %.3fs', name, rows, self.timings[name])
+            return
+
+    def close_cursor(self, cnx, cur):
+        # abgebrochener Stream: Rest verwerfen, sonst "Unread result found"
+        if cnx.unread_result:
+            cnx.consume_results()
+        cur.close()
+
+    def query(self, name, **params):
+        # ganzes Ergebnis als ein Frame, blockweise spaltenorientiert zusammengesetzt
+        return pd.concat(self.stream(name, **params), ignore_index=True, copy=False)
+
+
+class SQLiteDatabase(Database):
+    # lokaler Ersatz für MySQL (Tests, Benchmarks): gleiche Queries, gleiche Schnittstelle
+    def __init__(self, path, retries=0, timeout=10, batch_size=50000):
+        super().__init__({'database': path}, retries=retries, timeout=timeout,
+                         batch_size=batch_size)
+
+    def cursor(self, cnx):
+        # sqlite3 liefert ohnehin zeilenweise
+        return cnx.cursor()
+
+    def close_cursor(self, cnx, cur):
+        cur.close()
+
+    def prepare(self, sql):
+        # %(name)s -> :name
+        return re.sub(r'%\((\w+)\)s', r':\1', sql)
+
+    @contextmanager
+    def connection(self):
+        cnx = sqlite3.connect(self.config['database'], timeout=self.timeout,
+                              check_same_thread=False)
+        try:
+            yield cnx
+        finally:
+            cnx.close()
@@ -0,0 +1,49 @@
+# Abfragen auf Anfrage: Drill-down per Klick auf einen Chart, Perioden (periods.py)
+# Ergebnisse liegen in einem begrenzten LRU/TTL Cache, Key = Name + Parameter + Dataset
+# Version. Gleichzeitige identische Abfragen (mehrere Nutzer, Doppelklick) gehen per
+# SingleFlight nur einmal an DB bzw. API.
+
+import dash_core_components as dcc
+
+import metrics
+from figcache import FigureCache
+from singleflight import SingleFlight
+
+HIDDEN = {'display': 'none'}
+VISIBLE = {}
+
+
+def drill_graph(graph_id):
+    # Platz für die Detail Figure, sichtbar ab dem ersten Klick
+    return dcc.Graph(id=graph_id, style=HIDDEN)
+
+
+def clicked(click_data, key='x'):
+    # Wert des angeklickten Punkts, None ohne Klick
+    if not click_data or not click_data.get('points'):
+        return None
+    return click_data['points'][0].get(key)
+
+
+class OnDemand:
+    def __init__(self, version, maxsize=128, ttl=600):
+        # version: Funktion, die die aktuelle Dataset Version liefert
+        self.version = version
+        self.results = FigureCache(maxsize, ttl)
+        self.flight = SingleFlight()
+
+    def get(self, name, load, *params):
+        # name + params = Drill Pfad bzw. Periode, load(*params) liefert das Ergebnis
+        key = (name, self.version()) + tuple(params)
+        df = self.results.get(key)
+        if df is not None:
+            metrics.inc('pydash_ondemand_total', query=name, result='hit')
+            return df
+        metrics.inc('pydash_ondemand_total', query=name, result='miss')
+        return self.flight.do(key, lambda: self._load(key, load, params))
+
+    def _load(self, key, load, params):
+        with metrics.timed('pydash_ondemand_seconds', query=key[0]):
+            df = load(*params)
+        self.results.put(key, df)
+        return df
@@ -0,0 +1,91 @@
+# LRU/TTL Cache für Callback Figures
+# Key = Callback Name + Dataset Version + Inputs, gespeichert wird das bereits
+# serialisierte Figure Dict - ein Treffer spart Filter und Plotly Express komplett.
+# Gleichzeitige Misses mit demselben Key (mehrere Nutzer, gleicher Slider Wert) rechnen
+# per SingleFlight nur einmal, auch bei maxsize 0.
+# maxbytes > 0: zusätzlich die Summe der bei put() angegebenen Größen begrenzen.
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from singleflight import SingleFlight
+
+
+class FigureCache:
+    def __init__(self, maxsize=256, ttl=3600, coalesce=True, maxbytes=0):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.flight = SingleFlight() if coalesce else None
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                if item is not None:
+                    del self._items[key]
+                    self.bytes -= item[2]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value, size=0):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._items[key] = (time.monotonic(), value, size)
+            self.bytes += size
+            # ein Eintrag größer als maxbytes wird gleich wieder verdrängt
+            while self._items and (len(self._items) > self.maxsize
+                                   or self.maxbytes and self.bytes > self.maxbytes):
+                _, item = self._items.popitem(last=False)
+                self.bytes -= item[2]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._items), 'bytes': self.bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions,
+                    'coalesced': self.flight.coalesced if self.flight else 0}
+
+    def cached(self, name, version):
+        # version: Funktion, die die aktuelle Dataset Version liefert
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                # Dropdown/Slider Werte sind Listen -> als JSON hashbar machen
+                key = (name, version(), json.dumps(args, sort_keys=True, default=str))
+                value = self.get(key)
+                if value is None:
+                    if self.flight is None:
+                        return self._compute(key, func, args)
+                    value = self.flight.do(key, lambda: self._compute(key, func, args))
+                return value
+            return wrapper
+        return decorator
+
+    def _compute(self, key, func, args):
+        fig = func(*args)
+        with metrics.stage('to_json'):
+            value = fig.to_plotly_json() if hasattr(fig, 'to_plotly_json') else fig
+        self.put(key, value)
+        return value
@@ -0,0 +1,25 @@
+# gunicorn Konfiguration
+# gunicorn -c gunicorn.conf.py "app:create_app()"
+# PRELOAD=1: Daten und Figures einmal im Master laden, die Worker erben sie per fork
+# WORKER_CLASS=gthread (Standard): THREADS Threads pro Worker, ein langsamer Callback
+# blockiert nur einen Thread statt eines Workers. gevent (pip install gevent) für viele
+# offene Verbindungen, z.B. PUSH_MODE=sse. sync = ein Request pro Worker wie bisher.
+
+import os
+import time
+
+bind = os.getenv("BIND", "0.0.0.0:8050")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+worker_class = os.getenv("WORKER_CLASS", "gthread")
+threads = int(os.getenv("THREADS", "8"))
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+preload_app = os.getenv("PRELOAD", "1") == "1"
+
+
+def post_fork(server, worker):
+    # mit preload ist app schon importiert, sonst nur der leichte Import ohne Daten
+    start = time.perf_counter()
+    import app
+    app.after_fork()
+    worker.log.info('worker %s after_fork %.3fs', worker.pid, time.perf_counter() - start)
@@ -0,0 +1,67 @@
+# Filter Indizes über die geladenen Frames
+# Beim Laden einmal aufgebaut: sortierte Offsets für Bereiche (Jahr) und Partitionen
+# pro Kategorie (Product Group, Customer Program/Newsletter). Die Callbacks
+# schneiden damit per Position statt den ganzen Frame mit einer Maske zu scannen.
+
+import itertools
+
+import numpy as np
+
+
+class FrameIndex:
+    def __init__(self, df, range_col=None, partition=None):
+        self.frame = df
+        self.range_col = range_col
+        self.partition = partition
+        self._all = self._sorted(np.arange(len(df)))
+        self._parts = {}
+        if partition is not None:
+            for key, pos in df.groupby(partition, sort=False, observed=True).indices.items():
+                self._parts[key] = self._sorted(pos)
+
+    def _sorted(self, pos):
+        # Positionen nach dem Bereichs-Key sortiert + die sortierten Keys
+        if self.range_col is None:
+            return pos, None
+        keys = self.frame[self.range_col].to_numpy()[pos]
+        order = np.argsort(keys, kind='stable')
+        return pos[order], keys[order]
+
+    @staticmethod
+    def _slice(part, lo, hi):
+        pos, keys = part
+        if keys is None:
+            return pos
+        start = 0 if lo is None else np.searchsorted(keys, lo, side='left')
+        stop = len(keys) if hi is None else np.searchsorted(keys, hi, side='right')
+        return pos[start:stop]
+
+    def positions(self, lo=None, hi=None, keys=None):
+        if keys is None:
+            parts = [self._all]
+        else:
+            parts = [self._parts[k] for k in keys if k in self._parts]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        pos = np.concatenate([self._slice(p, lo, hi) for p in parts])
+        # ursprüngliche Reihenfolge beibehalten, die Charts sortieren nicht selbst
+        pos.sort()
+        return pos
+
+    def select(self, lo=None, hi=None, keys=None):
+        return self.frame.take(self.positions(lo, hi, keys))
+
+
+def pairs(*values):
+    # Keys für Partitionen über mehrere Spalten, z.B. (Customer Program, Newsletter)
+    return list(itertools.product(*values))
+
+
+def build_indexes(frames):
+    return {
+        'df_sql_data': FrameIndex(frames['df_sql_data'], range_col='row_year'),
+        'df_prd_grp_quantity': FrameIndex(frames['df_prd_grp_quantity'],
+                                          range_col='Year', partition='Product Group'),
+        'df_sales_qty': FrameIndex(frames['df_sales_qty'],
+                                   partition=['Customer Program', 'Newsletter']),
+    }
@@ -0,0 +1,58 @@
+# KPI Engine: Wert, Referenz (Plan, Vorjahr), Abweichung und Verhältnis für beliebige
+# Kennzahlen und Segmente in einem groupby, dargestellt als Indikator Grid in einer Figure.
+# Ein KPI Frame hat eine Zeile pro (Segment..., Kennzahl) und die Spalten
+# value, reference, delta, ratio.
+
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def kpi_frame(df, measures, column='forecast', actual='ist', reference='plan', by=()):
+    # df: Zeilen mit column (z.B. ist/plan oder Jahr), Segment Spalten by, Kennzahlen
+    by = list(by)
+    sums = df.groupby(by + [column], observed=True)[list(measures)].sum()
+    # (Segment..., column) x Kennzahl -> (Segment..., Kennzahl) x column
+    wide = sums.rename_axis(columns='measure').stack().unstack(column)
+    kpis = pd.DataFrame({
+        'value': wide[actual] if actual in wide.columns else 0.0,
+        'reference': wide[reference] if reference in wide.columns else 0.0,
+    }, index=wide.index).fillna(0.0)
+    kpis['delta'] = kpis['value'] - kpis['reference']
+    kpis['ratio'] = kpis['value'] / kpis['reference'].replace(0, np.nan)
+    return kpis
+
+
+def kpi_title(key, titles):
+    # key: Kennzahl oder (Segment..., Kennzahl), titles: Kennzahl -> Titel
+    if not isinstance(key, tuple):
+        return titles.get(key, key)
+    *segments, measure = key
+    return '%s<br><sub>%s</sub>' % (titles.get(measure, measure),
+                                     ' / '.join(str(s) for s in segments))
+
+
+def indicator_grid(kpis, titles, mode='number+delta', columns=3, relative=False,
+                   row_height=180):
+    # alle Zeilen des KPI Frames als go.Indicator in einer Figure, Raster mit columns Spalten
+    n = len(kpis)
+    columns = max(min(columns, n), 1)
+    traces = [
+        go.Indicator(
+            title=kpi_title(key, titles),
+            mode=mode,
+            value=value,
+            delta={'reference': reference, 'relative': relative},
+            domain={'row': i // columns, 'column': i % columns}
+        )
+        for i, (key, value, reference) in enumerate(zip(
+            kpis.index, kpis['value'].to_numpy(), kpis['reference'].to_numpy()))
+    ]
+    fig = go.Figure(traces)
+    if n > 1:
+        rows = math.ceil(n / columns)
+        fig.update_layout(grid={'rows': rows, 'columns': columns, 'pattern': 'independent'},
+                          height=rows * row_height)
+    return fig
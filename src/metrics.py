@@ -0,0 +1,175 @@
+# Metriken für die heißen Pfade: SQL Queries, API Fetches, Laden der Datasets und
+# Callbacks (Filter, Figure bauen, Serialisieren), dazu Dauer pro HTTP Route.
+# Ausgabe im Prometheus Textformat unter /metrics (register()).
+# Die Werte gelten pro Prozess, unter gunicorn also pro Worker.
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+import flask
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels(labels, extra=()):
+    items = sorted(labels) + list(extra)
+    if not items:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (k, str(v).replace('\\', r'\\')
+                                          .replace('"', r'\"').replace('\n', r'\n'))
+                             for k, v in items)
+
+
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                # Zähler pro Bucket, Summe, Anzahl
+                h = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, le in enumerate(self.buckets):
+                if seconds <= le:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def gauge(self, name, func, **labels):
+        # Wert wird erst beim Abruf von /metrics gelesen
+        self._gauges[(name, tuple(sorted(labels.items())))] = func
+
+    @contextmanager
+    def timed(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE %s %s' % (name, kind))
+
+        for (name, labels), value in counters:
+            declare(name, 'counter')
+            lines.append('%s%s %s' % (name, _labels(labels), value))
+        for (name, labels), h in histograms:
+            declare(name, 'histogram')
+            for le, n in zip(self.buckets, h):
+                lines.append('%s_bucket%s %d' % (name, _labels(labels, [('le', le)]), n))
+            lines.append('%s_bucket%s %d' % (name, _labels(labels, [('le', '+Inf')]), h[-1]))
+            lines.append('%s_sum%s %.6f' % (name, _labels(labels), h[-2]))
+            lines.append('%s_count%s %d' % (name, _labels(labels), h[-1]))
+        for (name, labels), func in sorted(self._gauges.items(), key=lambda i: i[0]):
+            try:
+                value = func()
+            except Exception:
+                logger.exception('gauge %s failed', name)
+                continue
+            if value is None:
+                continue
+            declare(name, 'gauge')
+            lines.append('%s%s %s' % (name, _labels(labels), value))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+gauge = registry.gauge
+timed = registry.timed
+
+
+# Labels des gerade laufenden Callbacks (callback, output), gesetzt von CallbackTimer
+_current = threading.local()
+
+
+def stage(name):
+    # Abschnitt des laufenden Callbacks, z.B. with stage('filter'): ...
+    labels = getattr(_current, 'labels', None) or {'callback': 'none', 'output': 'none'}
+    return timed('pydash_callback_seconds', stage=name, **labels)
+
+
+class CallbackTimer:
+    # misst Callbacks, loggt langsame mit ihren Inputs und optional einem cProfile
+    def __init__(self, slow_ms=0, profile=False, top=25):
+        self.slow_ms = slow_ms
+        self.profile = profile
+        self.top = top
+
+    def call(self, func, args, kwargs, callback, output):
+        # Inputs landen nur im Log, als Label wären es zu viele Zeitreihen
+        _current.labels = {'callback': callback, 'output': output}
+        profiler = cProfile.Profile() if self.profile else None
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            _current.labels = None
+            observe('pydash_callback_seconds', seconds,
+                    callback=callback, output=output, stage='function')
+            if self.slow_ms and seconds * 1000 >= self.slow_ms:
+                self.log_slow(callback, output, seconds, args, profiler)
+
+    def log_slow(self, callback, output, seconds, args, profiler):
+        inc('pydash_slow_callbacks_total', callback=callback, output=output)
+        inputs = json.dumps(args, default=str)
+        logger.warning('slow callback %s (%s): %.0f ms, inputs %s',
+                       callback, output, seconds * 1000, inputs[:1000])
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.top)
+            logger.warning('profile %s (%s):\n%s', callback, output, out.getvalue())
+
+
+def register(server, path='/metrics'):
+    # Dauer pro Route (Flask url_rule, nicht die volle URL) und Status Codes
+    @server.before_request
+    def _start():
+        flask.g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def _finish(response):
+        start = getattr(flask.g, 'metrics_start', None)
+        rule = flask.request.url_rule.rule if flask.request.url_rule else 'unmatched'
+        if start is not None and rule != path:
+            observe('pydash_http_request_seconds', time.perf_counter() - start,
+                    route=rule, method=flask.request.method)
+            inc('pydash_http_requests_total', route=rule, status=response.status_code)
+        return response
+
+    @server.route(path)
+    def _metrics():
+        return flask.Response(registry.render(),
+                              mimetype='text/plain; version=0.0.4; charset=utf-8')
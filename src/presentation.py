@@ -0,0 +1,48 @@
+# Presentation Layer: Werte -> Anzeige, deklarativ und vektorisiert
+# Mappings (z.B. 0/1 -> no/yes) laufen über die Kategorien statt pro Zeile,
+# Label-Spalten für die Charts (syear, smonth) entstehen erst beim Rendern.
+
+import pandas as pd
+
+YES_NO = {0: 'no', 1: 'yes'}
+
+# Dataset -> Spalte -> Mapping, beim Laden angewendet
+MAPPINGS = {
+    'df_sales_cust': {
+        'Customer Program': YES_NO,
+        'Newsletter': YES_NO,
+    },
+}
+
+# Label-Spalte -> Quellspalte, beim Rendern abgeleitet
+LABELS = {
+    'syear': 'Year',
+    'smonth': 'Month',
+}
+
+
+def map_values(s, mapping):
+    # nur die (wenigen) Kategorien umbenennen, die Codes bleiben
+    cat = s.astype('category')
+    return cat.cat.rename_categories([mapping[c] for c in cat.cat.categories])
+
+
+def present(name, df):
+    mappings = MAPPINGS.get(name)
+    if not mappings:
+        return df
+    df = df.copy()
+    for col, mapping in mappings.items():
+        if col in df.columns:
+            df[col] = map_values(df[col], mapping)
+    return df
+
+
+def as_label(s):
+    # factorize ist vektorisiert, str() nur einmal pro eindeutigem Wert
+    codes, uniques = pd.factorize(s, sort=True)
+    return pd.Categorical.from_codes(codes, [str(u) for u in uniques])
+
+
+def with_labels(df, *labels):
+    return df.assign(**{label: as_label(df[LABELS[label]]) for label in labels})
@@ -0,0 +1,108 @@
+# Push der Dataset Version an offene Dashboards
+# /_push/events: Server-Sent Events, ein Event pro neuer Version, dazwischen Heartbeats.
+# /_push/version: aktuelle Version als JSON, Fallback ohne EventSource (PUSH_MODE=interval).
+# Im Browser (assets/push.js) schreibt ein dcc.Interval Tick die zuletzt gemeldete Version
+# in einen dcc.Store, erst eine neue Version löst Callbacks auf dem Server aus.
+# Ein offener Stream belegt unter sync Workern einen ganzen Worker, Streams enden daher
+# nach stream_seconds und der Browser verbindet sich neu.
+
+import json
+import threading
+import time
+
+import dash_core_components as dcc
+import flask
+from dash.dependencies import ClientsideFunction, Input, Output, State
+
+import metrics
+
+
+class VersionFeed:
+    def __init__(self, version, poll=1.0):
+        # version: Funktion, die die aktuelle Dataset Version liefert
+        self.version = version
+        self.poll = poll
+        self.streams = 0
+        self._cond = threading.Condition()
+
+    def notify(self, *args):
+        # vom DataStore nach jeder neuen Version (DataStore.listeners)
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, known, timeout):
+        # neue Version oder None nach timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                version = self.version()
+                if version != known:
+                    return version
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                # auch ohne notify regelmäßig prüfen
+                self._cond.wait(min(self.poll, remaining))
+
+    def events(self, seconds, heartbeat=15):
+        # SSE Stream: zuerst die aktuelle Version, dann jede neue
+        yield 'retry: 5000\n\n'
+        known = None
+        end = time.monotonic() + seconds
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            version = self.wait(known, min(heartbeat, remaining))
+            if version is None:
+                yield ': ping\n\n'
+                continue
+            known = version
+            metrics.inc('pydash_push_events_total')
+            yield 'event: version\ndata: %s\n\n' % json.dumps({'version': version})
+
+
+def register(app, feed, mode='interval', poll_ms=30000, tick_ms=1000, stream_seconds=300):
+    # Routen unter /_push/ und die Clientside Callback Anbindung, liefert die Layout Komponenten
+    server = app.server
+    prefix = app.config.routes_pathname_prefix + '_push/'
+
+    @server.route(prefix + 'events')
+    def _push_events():
+        def stream():
+            feed.streams += 1
+            try:
+                yield from feed.events(stream_seconds)
+            finally:
+                feed.streams -= 1
+        return flask.Response(
+            flask.stream_with_context(stream()), mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @server.route(prefix + 'version')
+    def _push_version():
+        response = flask.jsonify({'version': feed.version()})
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    metrics.gauge('pydash_push_streams', lambda: feed.streams)
+
+    if mode != 'off':
+        app.clientside_callback(
+            ClientsideFunction('push', 'version'),
+            Output('push_version', 'data'),
+            Input('push_tick', 'n_intervals'),
+            State('push_config', 'data'),
+            State('push_version', 'data'))
+
+    def components(version):
+        # push_version: zuletzt gemeldete Version, Input für die Update Callbacks
+        config = {'mode': mode, 'poll_ms': poll_ms,
+                  'url': app.config.requests_pathname_prefix + '_push/'}
+        return [
+            dcc.Store(id='push_version', data=version),
+            dcc.Store(id='push_config', data=config),
+            dcc.Interval(id='push_tick', interval=tick_ms, disabled=mode == 'off'),
+        ]
+
+    return components
@@ -0,0 +1,96 @@
+# Reduktion großer Chart Traces vor dem Figure Aufbau
+# - top_n: vorab pro x/Farbe summieren, nur die n größten Kategorien einer Achse,
+#   der Rest landet in einem "Other" Balken
+# - downsample: Zeitreihen per LTTB (Largest-Triangle-Three-Buckets) auf n Punkte
+# So bleiben Payload und Renderzeit im Browser begrenzt, egal wie groß die Frames werden.
+
+import numpy as np
+import pandas as pd
+
+OTHER = 'Other'
+
+
+def top_n(df, x, y, n, by=(), within=(), other=OTHER):
+    # by: Spalten, die erhalten bleiben (Farbe, Filter), within: Top n pro Gruppe,
+    # der Rest dann als "Other (Gruppe)"; n <= 0 nur summieren
+    by, within = list(by), list(within)
+    ys = [y] if isinstance(y, str) else list(y)
+    keys = list(dict.fromkeys([x] + within + by))
+    df = df.groupby(keys, observed=True)[ys].sum().reset_index()
+    if n <= 0:
+        return df
+
+    totals = df.groupby(within + [x], observed=True)[ys[0]].sum()
+    rank = (totals.groupby(level=within) if within else totals).rank(
+        method='first', ascending=False)
+    if not len(rank) or rank.max() <= n:
+        return df
+
+    keep = df.join((rank <= n).rename('_keep'), on=within + [x])['_keep'].to_numpy()
+    labels = df[x].astype(str)
+    rest = _overflow(df, within, other)
+    # heißt eine echte Kategorie wie der Rest Balken, den Rest umbenennen statt zu mischen
+    real = labels.unique()
+    while rest[~keep].isin(real).any():
+        other += '*'
+        rest = _overflow(df, within, other)
+    df = df.assign(**{x: labels.where(keep, rest)})
+    df = df.groupby(keys, observed=True)[ys].sum().reset_index()
+
+    # größte zuerst, "Other" ans Ende - Plotly zeigt Kategorien in Reihenfolge der Zeilen
+    is_other = ~df[x].isin(labels[keep])
+    total = df.groupby(x)[ys[0]].transform('sum')
+    order = np.lexsort((-total.to_numpy(), is_other.to_numpy()))
+    df = df.take(order).reset_index(drop=True)
+    df[x] = pd.Categorical(df[x], categories=list(dict.fromkeys(df[x])))
+    return df
+
+
+def _overflow(df, within, other):
+    # Label des Rest Balkens pro Zeile, mit within pro Gruppe
+    if within:
+        return other + ' (' + df[within[0]].astype(str) + ')'
+    return pd.Series(other, index=df.index)
+
+
+def lttb(x, y, n):
+    # Indizes der n Punkte, die die Form der Kurve am besten erhalten, x aufsteigend
+    length = len(x)
+    if n >= length or n < 3:
+        return np.arange(length)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # erster und letzter Punkt fest, dazwischen n - 2 Buckets
+    edges = np.linspace(1, length - 1, n - 1).astype(int)
+    idx = np.empty(n, dtype=np.int64)
+    idx[0], idx[-1] = 0, length - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < n - 1 else length
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Dreiecksfläche aus dem letzten Punkt, Kandidat und Mittel des nächsten Buckets
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def downsample(df, x, y, n, by=()):
+    # pro Trace (by, z.B. Farbe) höchstens n Punkte; n <= 0 = aus
+    if n <= 0 or len(df) <= n:
+        return df
+    df = df.sort_values(list(by) + [x], kind='mergesort')
+    if not by:
+        return df.take(lttb(_numeric(df[x]), df[y], n))
+    parts = [part.take(lttb(_numeric(part[x]), part[y], n))
+             for _, part in df.groupby(list(by), observed=True, sort=False)]
+    return pd.concat(parts) if parts else df
+
+
+def _numeric(s):
+    # Datum -> ns, Kategorien/Zahlen -> float
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.astype('int64').to_numpy()
+    return pd.to_numeric(s).to_numpy()
@@ -0,0 +1,132 @@
+# Background Refresh der Datasets
+# Ein Thread lädt die Daten im Intervall neu und tauscht den Snapshot atomar aus,
+# Callbacks und Layout lesen bis dahin weiter die vorherige Version.
+# warm_start(): mit Cache sofort vom Snapshot auf Platte starten, ist der abgelaufen,
+# prüft der Thread die Quellen direkt nach dem Start.
+# sync(): pro Request, übernimmt eine neuere Version aus dem SharedCache.
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# memo: pro Version einmal abgeleitete Daten (z.B. fertige Figures), lebt mit dem Snapshot
+Snapshot = namedtuple('Snapshot', ['version', 'frames', 'loaded_at', 'indexes', 'memo'])
+
+
+class DataStore:
+    def __init__(self, loader, interval=3600, cache=None, prepare=None):
+        self.loader = loader
+        self.interval = interval
+        # optional: SharedCache, dann lädt nur ein Worker und alle teilen die Version
+        self.cache = cache
+        # optional: baut aus den Frames Hilfsstrukturen (z.B. Filter Indizes)
+        self.prepare = prepare
+        # Funktionen, die nach jeder neuen Version mit dem Snapshot aufgerufen werden
+        self.listeners = []
+        self._snapshot = Snapshot(0, {}, None, {}, {})
+        self._reload_lock = threading.Lock()
+        # mtime von meta.json beim letzten sync()
+        self._meta_mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self):
+        # eine Referenz lesen ist atomar - der Aufrufer bekommt immer ein konsistentes Set
+        return self._snapshot
+
+    def indexes(self):
+        return self._snapshot.indexes
+
+    def _install(self, version, frames, loaded_at):
+        indexes = self.prepare(frames) if self.prepare else {}
+        self._snapshot = Snapshot(version, frames, loaded_at, indexes, {})
+        logger.info('data reloaded, version %s', self._snapshot.version)
+        for listener in self.listeners:
+            listener(self._snapshot)
+        return self._snapshot
+
+    def stale(self):
+        return self.cache is not None and not self.cache.is_fresh(self.cache.meta())
+
+    def warm_start(self):
+        # letzter Snapshot von Platte, auch wenn die Quellen nicht erreichbar sind
+        cached = self.cache.read() if self.cache is not None else None
+        if cached is None:
+            return self.reload()
+        with self._reload_lock:
+            snap = self._install(*cached)
+        logger.info('warm start from snapshot version %s (%s)', snap.version,
+                    'stale, checking sources' if self.stale() else 'fresh')
+        return snap
+
+    def reload(self):
+        # nur ein Reload gleichzeitig, Leser werden nicht blockiert
+        with self._reload_lock:
+            if self.cache is not None:
+                version, frames, loaded_at = self.cache.get_or_load(self.loader)
+                if version == self._snapshot.version:
+                    # gleiche Daten, nur neu geprüft
+                    self._snapshot = self._snapshot._replace(loaded_at=loaded_at)
+                    return self._snapshot
+            else:
+                version, frames, loaded_at = (
+                    self._snapshot.version + 1, self.loader(), time.time())
+            return self._install(version, frames, loaded_at)
+
+    def sync(self):
+        # neuere Version, die ein anderer Worker in den SharedCache geschrieben hat, sofort
+        # übernehmen statt erst mit dem nächsten Refresh - pro Aufruf nur ein stat()
+        if self.cache is None:
+            return
+        mtime = self.cache.mtime()
+        if mtime is None or mtime == self._meta_mtime:
+            return
+        # läuft gerade ein Reload, nicht warten
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._meta_mtime = mtime
+            meta = self.cache.meta()
+            # nur vorwärts, eine ältere Version nie installieren
+            if meta is not None and meta['version'] > self._snapshot.version:
+                self._install(*self.cache.read(meta))
+        except Exception:
+            logger.exception('data sync failed, keeping version %s', self._snapshot.version)
+        finally:
+            self._reload_lock.release()
+
+    def _run(self):
+        # abgelaufener Snapshot (warm_start) -> gleich prüfen, sonst nach interval
+        wait = 0 if self.stale() else self.interval
+        while not self._stop.wait(wait):
+            try:
+                self.reload()
+            except Exception:
+                # alte Version weiter ausliefern
+                logger.exception('data reload failed, keeping version %s',
+                                 self._snapshot.version)
+            if self.interval <= 0:
+                return
+            wait = self.interval
+
+    def start(self):
+        # interval <= 0: kein Refresh, nur die einmalige Prüfung eines alten Snapshots
+        if self._thread is not None or (self.interval <= 0 and not self.stale()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='data-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
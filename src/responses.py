@@ -0,0 +1,156 @@
+# Vorserialisierte, komprimierte Antworten für Layout und Callbacks
+# Das Layout JSON (und die Callback Antworten) werden pro Dataset Version einmal
+# serialisiert, einmal pro Encoding (br/gzip) komprimiert und mit ETag ausgeliefert.
+# Serialisiert wird mit orjson, falls installiert, sonst mit dem Plotly Encoder.
+
+import functools
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+import dash
+import flask
+import plotly
+
+import metrics
+from figcache import FigureCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_plotly_encoder = plotly.utils.PlotlyJSONEncoder()
+
+
+def _default(obj):
+    # Dash Komponenten, numpy/pandas Typen die orjson nicht direkt kann
+    if hasattr(obj, 'to_plotly_json'):
+        return obj.to_plotly_json()
+    return _plotly_encoder.default(obj)
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder).encode()
+
+
+class Encoded:
+    # ein Body, pro Content-Encoding einmal komprimiert
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self._encoded = {}
+
+    def encode(self, encoding):
+        data = self._encoded.get(encoding)
+        if data is None:
+            if encoding == 'br':
+                data = brotli.compress(self.body, quality=9)
+            else:
+                data = gzip.compress(self.body, compresslevel=6)
+            self._encoded[encoding] = data
+        return data
+
+    @property
+    def size(self):
+        # Body und alle bisher komprimierten Kopien
+        return len(self.body) + sum(len(data) for data in self._encoded.values())
+
+
+def best_encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return flask.request.accept_encodings.best_match(offered)
+
+
+def encoded_response(entry, mimetype='application/json'):
+    encoding = best_encoding()
+    if encoding:
+        response = flask.Response(entry.encode(encoding), mimetype=mimetype)
+        # flask-compress lässt Antworten mit Content-Encoding in Ruhe
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = flask.Response(entry.body, mimetype=mimetype)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+class DataApp(dash.Dash):
+    def __init__(self, *args, version=None, cache_size=512, cache_bytes=0, timer=None,
+                 **kwargs):
+        # version: Funktion, die die aktuelle Dataset Version liefert
+        # cache_bytes: Obergrenze für Bodies + komprimierte Kopien im Cache (0 = keine)
+        # timer: metrics.CallbackTimer für Callback Dauer, langsame Callbacks, Profile
+        self.version = version or (lambda: 0)
+        self.responses = FigureCache(maxsize=cache_size, maxbytes=cache_bytes)
+        self.timer = timer or metrics.CallbackTimer()
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    def callback(self, *args, **kwargs):
+        register = super().callback(*args, **kwargs)
+
+        def wrap(func):
+            @functools.wraps(func)
+            def timed(*a, **kw):
+                start = time.perf_counter()
+                try:
+                    return self.timer.call(func, a, kw, callback=func.__name__,
+                                           output=flask.request.get_json()['output'])
+                finally:
+                    self._local.function_seconds = time.perf_counter() - start
+            return register(timed)
+        return wrap
+
+    def cached(self, key, make_body):
+        entry = self.responses.get(key)
+        if entry is None:
+            entry = Encoded(make_body())
+            self.responses.put(key, entry, entry.size)
+        return entry
+
+    def respond(self, key, entry):
+        size = entry.size
+        response = encoded_response(entry)
+        # neue komprimierte Kopie -> Größe im Cache nachtragen
+        if entry.size != size:
+            self.responses.put(key, entry, entry.size)
+        return response
+
+    def serve_layout(self):
+        key = ('layout', self.version())
+        entry = self.cached(key, lambda: dumps(self._layout_value()))
+        response = self.respond(key, entry)
+        # Browser fragt mit If-None-Match nach, bei gleicher Version 304 ohne Body
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(entry.etag)
+        return response.make_conditional(flask.request)
+
+    def dispatch(self):
+        # Callback Antworten hängen nur von den Inputs und der Dataset Version ab,
+        # der Request Body enthält alle Input/State Werte
+        key = ('callback', self.version(), flask.request.get_data())
+        entry = self.responses.get(key)
+        metrics.inc('pydash_response_cache_total', result='miss' if entry is None else 'hit')
+        if entry is None:
+            self._local.function_seconds = 0.0
+            start = time.perf_counter()
+            response = super().dispatch()
+            entry = Encoded(response.get_data())
+            self.responses.put(key, entry, entry.size)
+            # alles außer dem Callback selbst: JSON lesen, Dash Wrapper, Serialisieren
+            output = flask.request.get_json()['output']
+            metrics.observe('pydash_callback_seconds',
+                            time.perf_counter() - start - self._local.function_seconds,
+                            callback=self.callback_map[output]['callback'].__name__,
+                            output=output, stage='serialize')
+        return self.respond(key, entry)
@@ -0,0 +1,122 @@
+# Inkrementeller Tages-Rollup über dp_view
+# Statt bei jedem Laden SUM(...) GROUP BY über die ganze Historie zu rechnen, wird
+# nur ab dem Watermark (letztes row_dt) neu aggregiert und in den gespeicherten
+# Rollup übernommen. Chart- und Indikator-Frames werden daraus abgeleitet.
+
+import datetime
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ['umsatz', 'deckungsbeitrag', 'gewinn']
+
+
+class DailyRollup:
+    def __init__(self, db, path, lookback_days=7):
+        self.db = db
+        self.path = path
+        # die letzten Tage vor dem Watermark immer neu rechnen (Nachbuchungen)
+        self.lookback_days = lookback_days
+        self.frame = None
+        # mtime der Datei beim letzten Lesen/Schreiben
+        self._mtime = None
+        # ein Update gleichzeitig, auch wenn ein abgebrochenes Laden noch läuft
+        self._lock = threading.RLock()
+
+    def _load(self):
+        # neu lesen, wenn ein anderer Prozess den Rollup geschrieben hat (z.B. der Worker,
+        # der die neue Dataset Version lädt), sonst behält ein preload Worker den alten
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return self.frame
+        if self.frame is None or mtime != self._mtime:
+            self.frame = pd.read_feather(self.path)
+            self._mtime = mtime
+        return self.frame
+
+    def _save(self):
+        # pro Prozess eine eigene tmp Datei, mehrere Worker können schreiben
+        tmp = '%s.%d.tmp' % (self.path, os.getpid())
+        self.frame.reset_index(drop=True).to_feather(tmp)
+        os.replace(tmp, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def watermark(self):
+        frame = self._load()
+        if frame is None or frame.empty:
+            return None
+        # plan reicht in die Zukunft, ist nur bis heute -> kleinstes Maximum pro forecast
+        return frame.groupby('forecast')['row_dt'].max().min()
+
+    def update(self, deadline=None):
+        # deadline (time.monotonic()): danach wird das Ergebnis verworfen
+        with self._lock:
+            frame = self._load()
+            watermark = self.watermark()
+            if watermark is None:
+                since = datetime.date(1900, 1, 1)
+            else:
+                since = (watermark - pd.Timedelta(days=self.lookback_days)).date()
+
+            delta = self.db.query('daily_rollup', since=since)
+            if deadline is not None and time.monotonic() > deadline:
+                # load_data hat schon aufgegeben, den alten Rollup nicht mehr ersetzen
+                raise TimeoutError('rollup update since %s finished after the load timeout'
+                                   % since)
+            delta['row_dt'] = pd.to_datetime(delta['row_dt'])
+            delta['row_year'] = delta['row_year'].astype(str)
+            delta['row_month'] = delta['row_month'].astype(int)
+            for col in MEASURES:
+                # MySQL SUM liefert Decimal
+                delta[col] = delta[col].astype(float)
+
+            if frame is not None:
+                frame = frame[frame['row_dt'] < pd.Timestamp(since)]
+                delta = pd.concat([frame, delta], ignore_index=True)
+            self.frame = delta.sort_values(['row_dt', 'forecast'], ignore_index=True)
+            self._save()
+            logger.info('rollup updated since %s: %d rows', since, len(self.frame))
+            return self.frame
+
+    ########################################
+    # abgeleitete Frames, entsprechen den bisherigen dp_view Queries
+
+    def ensure(self):
+        # Rollup von Platte (bei jeder Änderung der Datei neu), sonst einmal aufbauen
+        if self._load() is None:
+            self.update()
+        return self.frame
+
+    def years(self):
+        return sorted(int(y) for y in self.ensure()['row_year'].unique())
+
+    def sales_by_year(self, year_from, year_to):
+        f = self.ensure()
+        f = f[(f['row_year'] >= str(year_from)) & (f['row_year'] <= str(year_to))]
+        df = f.groupby(['row_year', 'forecast'], as_index=False)[
+            ['umsatz', 'deckungsbeitrag']].sum()
+        return df.sort_values(['row_year', 'forecast'], ascending=[True, False],
+                              ignore_index=True)
+
+    def indicator_ytd(self, start, today=None):
+        f = self.ensure()
+        today = pd.Timestamp(today or datetime.date.today())
+        f = f[(f['row_dt'] >= pd.Timestamp(start)) & (f['row_dt'] < today)]
+        df = f.groupby('forecast')[['gewinn', 'umsatz', 'deckungsbeitrag']].sum()
+        df.columns = ['gewinn_ytd', 'umsatz_ytd', 'db_ytd']
+        return df.sort_index(ascending=False)
+
+    def profit_by_month(self, start, forecast, end=None):
+        # [start, end), ohne end bis einschließlich heute
+        f = self.ensure()
+        end = pd.Timestamp(end or datetime.date.today() + datetime.timedelta(days=1))
+        f = f[(f['row_dt'] >= pd.Timestamp(start)) & (f['row_dt'] < end)
+              & (f['forecast'] == forecast)]
+        df = f.groupby('row_month', as_index=False)['gewinn'].sum()
+        return df.rename(columns={'gewinn': 'gewinn_ytd'})
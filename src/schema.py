@@ -0,0 +1,99 @@
+# Schema der geladenen Datasets
+# Aus MySQL und der API kommen object Spalten (Strings, Decimal). Hier werden die
+# Frames auf kompakte, native Typen gebracht: category für Strings, float64 und
+# int32 für Zahlen.
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMAS = {
+    'df_sql_data': {
+        'row_year': 'int32',
+        'forecast': 'category',
+        'umsatz': 'float64',
+        'deckungsbeitrag': 'float64',
+    },
+    'df_indicator': {
+        'gewinn_ytd': 'float64',
+        'umsatz_ytd': 'float64',
+        'db_ytd': 'float64',
+    },
+    'df_ind_scatter': {
+        'row_month': 'int32',
+        'gewinn_ytd': 'float64',
+    },
+    'df_cust_prog': {
+        'Count': 'int32',
+        'CustomerProg': 'category',
+    },
+    'df_newsletter': {
+        'Count': 'int32',
+        'Newsletter': 'category',
+    },
+    'df_prd_grp_quantity': {
+        'Year': 'int32',
+        'Product Group': 'category',
+        'Descr': 'category',
+    },
+    'df_sales_cust': {
+        # 0/1, wird in presentation.py zu no/yes
+        'Customer Program': 'int32',
+        'Newsletter': 'int32',
+    },
+    'df_sales_qty': {
+        'Year': 'int32',
+        'Month': 'int32',
+        'Customer Program': 'int32',
+        'Newsletter': 'int32',
+    },
+    'df_prd_grp_kpi': {
+        'Product Group': 'category',
+    },
+    'df_periods': {
+        'year': 'int32',
+    },
+}
+
+
+def infer_dtype(s):
+    # Spalten ohne Schema Eintrag (z.B. neue API Felder)
+    if pd.api.types.is_bool_dtype(s) or isinstance(s.dtype, pd.CategoricalDtype):
+        return None
+    if pd.api.types.is_integer_dtype(s):
+        if s.empty or (s.min() >= -2**31 and s.max() < 2**31):
+            return 'int32'
+        return None
+    if pd.api.types.is_float_dtype(s):
+        return 'float64'
+    if s.dtype == object or pd.api.types.is_string_dtype(s):
+        # Decimal aus MySQL SUM oder Zahlen als Strings
+        numeric = pd.to_numeric(s, errors='coerce')
+        if numeric.notna().sum() == s.notna().sum() and s.notna().any():
+            return 'float64'
+        return 'category'
+    return None
+
+
+def typed(name, df):
+    schema = SCHEMAS.get(name, {})
+    df = df.copy()
+    for col in df.columns:
+        dtype = schema.get(col) or infer_dtype(df[col])
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        if dtype in ('float64', 'int32') and df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col])
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def memory_report(frames):
+    report = {name: int(df.memory_usage(index=True, deep=True).sum())
+              for name, df in frames.items()}
+    for name, size in report.items():
+        logger.info('memory %-20s %10d bytes', name, size)
+    return report
@@ -0,0 +1,141 @@
+# Tabellen mit serverseitigem Paging, Sortieren und Filtern
+# Das Layout enthält nur Spalten und Seitenzahl, die Zeilen einer Seite kommen per
+# Callback aus den Frames im Speicher. Sortierreihenfolgen und Filtermasken werden
+# pro Dataset Version einmal berechnet, danach ist eine Seite nur noch ein Slice.
+
+import math
+import threading
+
+import dash_table
+import numpy as np
+import pandas as pd
+from dash.dependencies import Input, Output
+
+# Dash filter_query Operatoren, siehe https://dash.plotly.com/datatable/callbacks
+OPERATORS = [['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'],
+             ['ne ', '!='], ['eq ', '='], ['contains '], ['datestartswith ']]
+
+
+def paged_table(table_id, df, page_size=20):
+    return dash_table.DataTable(
+        id=table_id,
+        columns=[{'name': c, 'id': c} for c in df.columns],
+        page_current=0,
+        page_size=page_size,
+        page_count=max(math.ceil(len(df) / page_size), 1),
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='multi',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
+        style_as_list_view=True,
+        style_header={'fontWeight': 'bold'},
+        style_cell={'textAlign': 'left', 'padding': '4px'},
+        style_data_conditional=[
+            {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgba(0, 0, 0, 0.05)'}],
+    )
+
+
+def split_filter_part(filter_part):
+    for operator_type in OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return [None] * 3
+
+
+def filter_mask(df, filter_query):
+    mask = np.ones(len(df), dtype=bool)
+    for part in filter_query.split(' && '):
+        col, op, value = split_filter_part(part)
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if op in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                s = s.astype(str)
+                value = str(value)
+            try:
+                m = {'eq': s == value, 'ne': s != value, 'lt': s < value,
+                     'le': s <= value, 'gt': s > value, 'ge': s >= value}[op]
+            except TypeError:
+                # z.B. Text-Vergleich auf einer Zahlenspalte
+                m = pd.Series(False, index=s.index)
+        elif op == 'contains':
+            m = s.astype(str).str.contains(str(value), case=False, regex=False)
+        else:
+            m = s.astype(str).str.startswith(str(value))
+        mask &= m.to_numpy()
+    return mask
+
+
+class TablePager:
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key, compute):
+        with self._lock:
+            value = self._cache.get(key)
+        if value is None:
+            value = compute()
+            with self._lock:
+                # alte Versionen verwerfen
+                self._cache = {k: v for k, v in self._cache.items() if k[0] == key[0]}
+                if len(self._cache) >= self.maxsize:
+                    self._cache.clear()
+                self._cache[key] = value
+        return value
+
+    def positions(self, key, df, sort_by, filter_query):
+        pos = np.arange(len(df))
+        if sort_by:
+            by = tuple((s['column_id'], s['direction']) for s in sort_by)
+            pos = self._cached((key, 'sort', by), lambda: df.reset_index(drop=True).sort_values(
+                [c for c, _ in by], ascending=[d == 'asc' for _, d in by],
+                kind='mergesort').index.to_numpy())
+        if filter_query:
+            mask = self._cached((key, 'filter', filter_query),
+                                lambda: filter_mask(df, filter_query))
+            pos = pos[mask[pos]]
+        return pos
+
+    def page(self, key, df, page_current, page_size, sort_by, filter_query):
+        pos = self._cached((key, 'page', repr(sort_by), filter_query),
+                           lambda: self.positions(key, df, sort_by, filter_query))
+        page_count = max(math.ceil(len(pos) / page_size), 1)
+        start = page_current * page_size
+        rows = df.take(pos[start:start + page_size])
+        return rows.to_dict('records'), page_count
+
+
+def register_table(app, table_id, frame, *inputs):
+    # frame(*Werte der inputs) liefert (key, df), key z.B. (Version, Periode, Dataset)
+    pager = TablePager()
+
+    @app.callback(
+        Output(table_id, 'data'),
+        Output(table_id, 'page_count'),
+        Input(table_id, 'page_current'),
+        Input(table_id, 'page_size'),
+        Input(table_id, 'sort_by'),
+        Input(table_id, 'filter_query'),
+        *inputs)
+    def update_table(page_current, page_size, sort_by, filter_query, *values):
+        key, df = frame(*values)
+        return pager.page(key, df, page_current or 0, page_size, sort_by, filter_query)
+
+    return update_table